@@ -1,3 +1,5 @@
+import sys
+
 from absl import flags
 
 FLAGS = flags.FLAGS
@@ -8,6 +10,10 @@ flags.DEFINE_bool("debug", False, "Run the server in debug mode. Provides messy-
 flags.DEFINE_list('run_versions', default='v1',
                   help='versions to run. Currently supported: [V1]')
 
+flags.DEFINE_bool("use_uvloop", sys.platform != "win32",
+                  "Run the server on uvloop's (faster) event loop, if uvloop is installed. uvloop doesn't support "
+                  "Windows.")
+
 flags.DEFINE_string('server_log_level', 'WARN',
                     help='The log level at which the command server should start printing out messages.')
 
@@ -20,8 +20,10 @@ import json
 import logging
 from enum import Enum
 from pathlib import Path
-from typing import Optional, List, Type, Dict, Union, cast, ClassVar, Set, TypeVar, Protocol, get_args
+from typing import Optional, List, Type, Dict, Union, cast, ClassVar, Set, FrozenSet, TypeVar, Protocol, get_args, Any, \
+    Callable
 
+import orjson
 from pydantic import Field, validator, root_validator
 from pydantic.dataclasses import dataclass
 from pydantic.main import BaseModel
@@ -36,6 +38,22 @@ SERVING_ADDRESS = "/noisebox/command_server/v1"
 logger = logging.getLogger('%s_schema' % (VERSION,))
 
 
+def _orjson_dumps(value: Any, *, default: Callable[[Any], Any], **dumps_kwargs) -> str:
+    """Serializes pydantic model output with orjson, which is much faster than the stdlib json pydantic defaults to.
+
+    pydantic passes any extra keyword arguments given to .json() along to here, as json.dumps() would take them. Only
+    the ones orjson has an equivalent for are supported: sort_keys, and indent - though orjson always indents by 2.
+    """
+    option = 0
+    if dumps_kwargs.pop("indent", None) is not None:
+        option |= orjson.OPT_INDENT_2
+    if dumps_kwargs.pop("sort_keys", False):
+        option |= orjson.OPT_SORT_KEYS
+    if dumps_kwargs:
+        raise TypeError("Unsupported json() arguments for orjson: '%s'" % ("', '".join(sorted(dumps_kwargs)),))
+    return orjson.dumps(value, default=default, option=option).decode()
+
+
 @dataclass
 class MessageObj(Protocol):
     @abc.abstractmethod
@@ -106,6 +124,12 @@ class Message(BaseModel):
     command: Optional["Types.COMMAND_TYPES"] = Field(description="Describes something that the server should do. "
                                                                  "Mutually exclusive with the 'event' field.")
 
+    class Config:
+        # Message is the envelope for everything sent over the wire, so it's the only model that gets serialized
+        # and parsed directly - nested commands and events go through it.
+        json_dumps = _orjson_dumps
+        json_loads = orjson.loads
+
     @validator("command", always=True)
     def ensure_one_of_command_or_event_set(cls, v, values):
         """Ensure only command or event is set
@@ -152,6 +176,10 @@ class Message(BaseModel):
         kwargs['exclude_unset'] = True
         return super(Message, self).json(*args, **kwargs)
 
+    def json_bytes(self) -> bytes:
+        """Same as json(), but returns the utf-8 encoded bytes orjson produces, saving a decode/encode round trip."""
+        return orjson.dumps(self.dict(exclude_unset=True), default=self.__json_encoder__)
+
 
 class Command(BaseModel):
     """The protocol defining what a Command payload looks like.
@@ -175,15 +203,19 @@ class Command(BaseModel):
 
     @validator('command_name', pre=True, always=True)
     def ensure_valid_command_name(cls, this_command_name: str):
-        command_names = set(c.COMMAND_NAME for c in COMMANDS)
         if not this_command_name:
             raise ValueError("command_name unset")
-        if this_command_name not in command_names:
+        if this_command_name not in COMMANDS_BY_NAME:
             raise ValueError("Could not find command name '%s' in possible command names: [%s]" % (
-                this_command_name, ", ".join(command_names)))
-        return this_command_name
+                this_command_name, _COMMAND_NAMES))
+        # Hand back the type's own name string rather than the parsed copy, so later lookups by name (e.g. dispatching
+        # the command) hit the identity fast path of the string compare.
+        return COMMANDS_BY_NAME[this_command_name].COMMAND_NAME
 
     def unwrap(self, command_t: Type["Types.P_T"]) -> "Types.P_T":
+        # Almost always unwrapped to exactly its own type, which needs no further checks.
+        if type(self) is command_t:
+            return cast(Types.P_T, self)
         if not issubclass(command_t, Command):
             raise TypeError(
                 "Expected Command to unwrap to a subclass of Command, instead got '%s'" % (class_name(command_t),))
@@ -195,10 +227,14 @@ class Command(BaseModel):
         return cast(Types.P_T, self)
 
     def wrap(self) -> Message:
-        assert any(isinstance(self, t) for t in COMMANDS), "Expected command type %s to be in '%s'" % (
-            class_name(self), (class_name(t) for t in COMMANDS))
+        # Message.construct() below doesn't validate anything, so this has to be a real check rather than an assert -
+        # those vanish under python -O.
+        if type(self) not in COMMANDS and not any(isinstance(self, t) for t in COMMANDS):
+            raise TypeError("Expected command type %s to be in '%s'" % (class_name(self), _COMMAND_CLASS_NAMES))
+        # This command has already been validated, and setting only it trivially satisfies Message's validators, so skip
+        # re-validating (and copying) it. The Message holds this command itself, rather than a copy.
         # noinspection PyTypeChecker
-        return Message(command=self, event=None)
+        return Message.construct(command=self, event=None)
 
 
 class Event(BaseModel):
@@ -218,15 +254,18 @@ class Event(BaseModel):
 
     @validator('event_name', pre=True, always=True)
     def ensure_valid_event_name(cls, this_event_name: str):
-        event_names = set(e.EVENT_NAME for e in EVENTS)
         if not this_event_name:
             raise ValueError("event_name unset")
-        if this_event_name not in event_names:
+        if this_event_name not in EVENTS_BY_NAME:
             raise ValueError("could not find event name '%s' in possible event names: [%s]" % (
-                this_event_name, ", ".join(event_names)))
-        return this_event_name
+                this_event_name, _EVENT_NAMES))
+        # See ensure_valid_command_name.
+        return EVENTS_BY_NAME[this_event_name].EVENT_NAME
 
     def unwrap(self, event_t: Type["Types.P_T"]) -> "Types.P_T":
+        # See Command.unwrap.
+        if type(self) is event_t:
+            return cast(Types.P_T, self)
         if not issubclass(event_t, Event):
             raise TypeError(
                 "expected Command to unwrap to a subclass of Command, instead got '%s'" % (class_name(event_t),))
@@ -238,10 +277,11 @@ class Event(BaseModel):
         return cast(Types.P_T, self)
 
     def wrap(self) -> Message:
-        assert any(isinstance(self, t) for t in EVENTS), "Expected event type %s to be in '%s'" % (
-            class_name(self), ", ".join(class_name(t) for t in EVENTS))
+        # See Command.wrap.
+        if type(self) not in EVENTS and not any(isinstance(self, t) for t in EVENTS):
+            raise TypeError("Expected event type %s to be in '%s'" % (class_name(self), _EVENT_CLASS_NAMES))
         # noinspection PyTypeChecker
-        return Message(event=self, command=None)
+        return Message.construct(event=self, command=None)
 
     @classmethod
     def create(cls: Type["Types.E_T"], **data) -> "Types.E_T":
@@ -387,9 +427,19 @@ class Types:
     C_T = TypeVar('C_T', bound=Command)
 
 
-COMMANDS: Set[Type[Command]] = {t for t in get_args(Types.COMMAND_TYPES)}
-EVENTS: Set[Type[Event]] = {t for t in get_args(Types.EVENT_TYPES)}
-OBJECTS: Set[Type[BaseModel]] = {t for t in get_args(Types.OBJECT_TYPES)}
+# Frozen, since these are fixed by the Types unions above.
+COMMANDS: FrozenSet[Type[Command]] = frozenset(get_args(Types.COMMAND_TYPES))
+EVENTS: FrozenSet[Type[Event]] = frozenset(get_args(Types.EVENT_TYPES))
+OBJECTS: FrozenSet[Type[BaseModel]] = frozenset(get_args(Types.OBJECT_TYPES))
+# Looks up message types by the name they're sent over the wire with - built once, since every message that's
+# parsed or validated gets its name checked against these.
+COMMANDS_BY_NAME: Dict[str, Type[Command]] = {c.COMMAND_NAME: c for c in COMMANDS}
+EVENTS_BY_NAME: Dict[str, Type[Event]] = {e.EVENT_NAME: e for e in EVENTS}
+# The lists of valid types and names quoted in error messages, which never change.
+_COMMAND_NAMES = ", ".join(sorted(COMMANDS_BY_NAME))
+_EVENT_NAMES = ", ".join(sorted(EVENTS_BY_NAME))
+_COMMAND_CLASS_NAMES = ", ".join(sorted(class_name(c) for c in COMMANDS))
+_EVENT_CLASS_NAMES = ", ".join(sorted(class_name(e) for e in EVENTS))
 _IGNORE_OBJECTS: Set[Type[object]] = {ErrorType, ErrorDataEnv, EventException, Types, MessageObj}
 
 
@@ -428,4 +478,5 @@ def prettify_message(msg: Optional[Union[str, "MessageObj"]]) -> str:
         return ""
     if isinstance(msg, str):
         msg = Message.parse_raw(msg)
-    return msg.wrap().json().encode('latin1').decode('unicode_escape')
+    # orjson doesn't escape non-ascii characters, so escape anything latin1 can't hold before un-escaping everything.
+    return msg.wrap().json().encode('latin1', 'backslashreplace').decode('unicode_escape')
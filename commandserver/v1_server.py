@@ -1,6 +1,5 @@
-import collections
 import logging
-from typing import Optional, Callable, Any, cast, List
+from typing import Optional, Callable, Any, List, Dict
 
 from absl import flags
 from pydantic import ValidationError
@@ -16,9 +15,6 @@ from medialogic import media_library, controller
 VERSION = "V1"
 FLAGS = flags.FLAGS
 
-# TODO: For type sanity, this NEEDS to be a class. Goddamn.
-Page = collections.namedtuple("Page", ["list_hash", "element"])
-
 
 class OutdatedPageException(Exception):
     pass
@@ -60,6 +56,15 @@ class MediaServer(websocket_muxer.Server):
         super(MediaServer, self).__init__()
         self.media_library = ml
         self.controller = c
+        # Handlers for each message type, keyed by the name it's sent over the wire with.
+        self._command_handlers: Dict[str, Callable[[Any], c_types.Event]] = {
+            c_types.TogglePlayCommand.COMMAND_NAME: self.toggle_play,
+            c_types.NextSongCommand.COMMAND_NAME: self.next_song,
+            c_types.ListPlaylistsCommand.COMMAND_NAME: self.list_playlists,
+        }
+        self._event_handlers: Dict[str, Callable[[Any], None]] = {
+            c_types.ErrorEvent.EVENT_NAME: self.error_event,
+        }
 
     @add_error_handling
     async def accept(self, command_str: str, client_session: ClientSession):
@@ -108,15 +113,13 @@ class MediaServer(websocket_muxer.Server):
         logging.error(error_event)
 
     def handle_command(self, command: c_types.Command) -> c_types.Event:
-        if command.command_name == c_types.TogglePlayCommand.COMMAND_NAME:
-            return self.toggle_play(cast(c_types.TogglePlayCommand, command))
-        if command.command_name == c_types.NextSongCommand.COMMAND_NAME:
-            return self.next_song(cast(c_types.NextSongCommand, command))
-        if command.command_name == c_types.ListPlaylistsCommand.COMMAND_NAME:
-            return self.list_playlists(cast(c_types.ListPlaylistsCommand, command))
-        raise NotImplementedError("Command type %s not implemented" % (class_name(command),))
+        handler = self._command_handlers.get(command.command_name, None)
+        if handler is None:
+            raise NotImplementedError("Command type %s not implemented" % (class_name(command),))
+        return handler(command)
 
     def handle_event(self, event: c_types.Event):
-        if event.event_name == c_types.ErrorEvent.EVENT_NAME:
-            return self.error_event(cast(c_types.ErrorEvent, event))
-        raise NotImplementedError("Event type %s not implemented" % (class_name(event),))
+        handler = self._event_handlers.get(event.event_name, None)
+        if handler is None:
+            raise NotImplementedError("Event type %s not implemented" % (class_name(event),))
+        return handler(event)
@@ -4,6 +4,7 @@ from typing import Protocol, Dict
 
 import websockets
 from absl import flags
+from websockets.framing import OP_TEXT
 
 # Import server flags.
 # noinspection PyUnresolvedReferences
@@ -20,7 +21,11 @@ class ClientSession:
         self._ws = ws
 
     async def send(self, message: MessageObj):
-        await self._ws.send(message.wrap().json())
+        # ws.send() only writes text frames for str payloads, and would re-encode the json we just decoded. Write
+        # the already-encoded bytes as a text frame directly instead. ensure_open() and write_frame() are undocumented
+        # websockets internals - see the note on the pin in requirements.txt before upgrading websockets.
+        await self._ws.ensure_open()
+        await self._ws.write_frame(True, OP_TEXT, message.wrap().json_bytes())
 
 
 class Server(Protocol):
@@ -43,9 +48,10 @@ class WebsocketMuxer:
 
     def __init__(self):
         self.servers: Dict[str, Server] = {}
-        self.logger = print_controller.logging_printer('websocket_mux',
-                                                       min_error_level_to_print=
-                                                       logging.getLevelName(FLAGS.server_log_level))
+        log_level = logging.getLevelName(FLAGS.server_log_level)
+        self.logger = print_controller.logging_printer('websocket_mux', min_error_level_to_print=log_level)
+        # Debug messages are logged a few times per connection, so skip building them entirely when filtered out.
+        self._debug = log_level <= logging.DEBUG
 
     URL_REGEX: re.Pattern = re.compile(r'^/?\w*(/\w*)*/?$')
 
@@ -62,7 +68,8 @@ class WebsocketMuxer:
     async def handle_session(self, ws: websockets.WebSocketServerProtocol, path: str):
         server = self.servers.get(path)
         if not server:
-            self.logger.debug("user attempted to connect to path '%s', which doesn't exist" % (path,))
+            if self._debug:
+                self.logger.debug("user attempted to connect to path '%s', which doesn't exist", path)
             await ws.close(server_codes.UNSUPPORTED_URI, "path '%s' not found" % (path,))
             return
 
@@ -74,7 +81,8 @@ class WebsocketMuxer:
                     raise server_exceptions.ClientError("this server does not accept binary frames")
                 await server.accept(message, session)
             except server_exceptions.CloseConnectionException as e:
-                self.logger.debug("client @ '%s' asked to close the server: %s" % (path, e))
+                if self._debug:
+                    self.logger.debug("client @ '%s' asked to close the server: %s", path, e)
                 await ws.close()
                 return
             except server_exceptions.ClientError as e:
@@ -82,6 +90,8 @@ class WebsocketMuxer:
                 await ws.close(server_codes.BAD_CLIENT, e.get_safe_close_message())
                 return
 
-        self.logger.debug("server loop finished for connection path '%s'" % (path,))
+        if self._debug:
+            self.logger.debug("server loop finished for connection path '%s'", path)
         await ws.wait_closed()
-        self.logger.debug("server @ '%s' closed. Code: '%s', Reason: '%s'" % (path, ws.close_code, ws.close_reason))
+        if self._debug:
+            self.logger.debug("server @ '%s' closed. Code: '%s', Reason: '%s'", path, ws.close_code, ws.close_reason)
@@ -3,7 +3,7 @@ Implements the Command class, in order to aid commandline processing.
 """
 import logging
 from abc import abstractmethod
-from argparse import ArgumentParser
+from argparse import ArgumentParser, Namespace
 from typing import List
 
 logger = logging.getLogger("media-player")
@@ -38,8 +38,12 @@ class Command(object):
 
         argv: Input string arguments from the command line.
         """
+        return self.do_function(**vars(self._parse(argv)))
+
+    def _parse(self, argv: List[str]) -> Namespace:
+        """Logs that this command is being run, then parses its arguments with the arg_parser."""
         logger.info("Processing command: %s - '%s", self.__name,  argv)
-        return self.do_function(**vars(self.arg_parser.parse_args(args=argv)))
+        return self.arg_parser.parse_args(args=argv)
 
     @abstractmethod
     def do_function(self, **arg_dict):
@@ -14,18 +14,30 @@ class Help(Command):
         ap.add_argument("command", nargs='?', help="the command on which to receive help")
         super().__init__(name="help", arg_parser=ap)
         self.command_dict = command_dict
+        self._command_names = ""
+        self._command_names_count = -1
 
     def do_function(self, command=""):
         if command is None:
             print_msg(self.help_string())
             return
         if command not in self.command_dict:
-            print_msg(
-                "Cannot find command '%s'.\n\nAvailable commands: '%s'" % (command, self.command_dict.keys()))
+            print_msg("Cannot find command '%s'.\n\nAvailable commands: '%s'" % (command, self._available_commands()))
             return
         print_msg(self.command_dict[command].help_string())
         return
 
+    def _available_commands(self) -> str:
+        """Returns the sorted, comma-separated command names.
+
+        The command dict is usually filled in after this command is created (it lists itself), so the names are
+        built lazily, and rebuilt only when the number of commands has changed since they were last built.
+        """
+        if self._command_names_count != len(self.command_dict):
+            self._command_names = ", ".join(sorted(self.command_dict))
+            self._command_names_count = len(self.command_dict)
+        return self._command_names
+
 
 class ListCommands(Command):
     """Lists all commands."""
@@ -4,15 +4,29 @@ Spells out some basic, codebase-wide exceptions.
 
 
 class UserException(Exception):
-    """Used to indicate a user error."""
+    """Used to indicate a user error.
 
-    def __init__(self, user_error_message):
-        super().__init__(user_error_message)
-        self.user_error_message = user_error_message
+    The message can be a %-style template with arguments, like a logging call. It's only formatted when it's actually
+    read, since plenty of these get caught without the message ever being shown, and the arguments can be big.
+    """
+
+    def __init__(self, user_error_message, *args):
+        super().__init__(user_error_message, *args)
+        self._user_error_message = user_error_message
+        self._message_args = args
+
+    @property
+    def user_error_message(self) -> str:
+        if self._message_args:
+            return self._user_error_message % self._message_args
+        return self._user_error_message
 
     def get_error_message(self) -> str:
         return self.user_error_message
 
+    def __str__(self):
+        return self.user_error_message
+
 
 class SystemException(Exception):
     """Used to indicate logical inconsistencies - e.g. bad format in serialized data."""
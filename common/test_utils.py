@@ -5,7 +5,7 @@ function (collect, at time of writing)
 """
 import sys
 import unittest
-from typing import List
+from typing import List, Dict, Callable
 from unittest.mock import Mock
 
 from absl import flags
@@ -55,6 +55,9 @@ def override_flag(key, value):
 class FlagsTest(unittest.TestCase):
     def setUp(self):
         super(FlagsTest, self).setUp()
+        # Flags only need to be parsed once per test binary - re-parsing for every test case just repeats work.
+        if FLAGS.is_parsed():
+            return
         try:
             FLAGS(sys.argv[sys.argv.index("--") + 1:])
         except ValueError:
@@ -99,31 +102,36 @@ def default_playlist():
                           songs=["Florgus"])
 
 
+# Factories for the default message of each message type, so a default is a single dict lookup away.
+_DEFAULT_EVENT_FACTORIES: Dict[types.Type[types.Event], Callable[[], types.Event]] = {
+    types.PlayStateEvent: lambda: types.PlayStateEvent.create(new_play_state=True),
+    types.SongPlayingEvent: lambda: types.SongPlayingEvent.create(current_song=default_song()),
+    types.ListSongsEvent: lambda: types.ListSongsEvent.create(songs=[default_song()]),
+    types.ListPlaylistsEvent: lambda: types.ListPlaylistsEvent(playlists=[default_playlist()]),
+    types.ErrorEvent: lambda: types.ErrorEvent(error_message="Not enough florgus in your tunes",
+                                               error_type=types.ErrorType.CLIENT_ERROR,
+                                               error_data="Get more florgus. Nao.",
+                                               error_env=types.ErrorDataEnv.DEBUG,
+                                               originating_command=str(get_default_command(types.NextSongCommand))),
+}
+
+_DEFAULT_COMMAND_FACTORIES: Dict[types.Type[types.Command], Callable[[], types.Command]] = {
+    types.TogglePlayCommand: lambda: types.TogglePlayCommand.create(play_state=False),
+    types.NextSongCommand: types.NextSongCommand.create,
+    types.ListSongsCommand: types.ListSongsCommand.create,
+    types.ListPlaylistsCommand: types.ListPlaylistsCommand.create,
+}
+
+
 def get_default_event(event_t: types.Type[types.Event]) -> types.Event:
-    if event_t == types.PlayStateEvent:
-        return types.PlayStateEvent.create(new_play_state=True)
-    if event_t == types.SongPlayingEvent:
-        return types.SongPlayingEvent.create(current_song=default_song())
-    if event_t == types.ListSongsEvent:
-        return types.ListSongsEvent.create(songs=[default_song()])
-    if event_t == types.ListPlaylistsEvent:
-        return types.ListPlaylistsEvent(playlists=[default_playlist()])
-    if event_t == types.ErrorEvent:
-        return types.ErrorEvent(error_message="Not enough florgus in your tunes",
-                                error_type=types.ErrorType.CLIENT_ERROR,
-                                error_data="Get more florgus. Nao.",
-                                error_env=types.ErrorDataEnv.DEBUG,
-                                originating_command=str(get_default_command(types.NextSongCommand)))
-    raise ValueError("Couldn't determine default event for event type '%s' =(" % (event_t,))
+    factory = _DEFAULT_EVENT_FACTORIES.get(event_t, None)
+    if factory is None:
+        raise ValueError("Couldn't determine default event for event type '%s' =(" % (event_t,))
+    return factory()
 
 
 def get_default_command(command_t: types.Type[types.Command]) -> types.Command:
-    if command_t == types.TogglePlayCommand:
-        return types.TogglePlayCommand.create(play_state=False)
-    if command_t == types.NextSongCommand:
-        return types.NextSongCommand.create()
-    if command_t == types.ListSongsCommand:
-        return types.ListSongsCommand.create()
-    if command_t == types.ListPlaylistsCommand:
-        return types.ListPlaylistsCommand.create()
-    raise ValueError("Couldn't determine default command for command type '%s' =(" % (command_t,))
+    factory = _DEFAULT_COMMAND_FACTORIES.get(command_t, None)
+    if factory is None:
+        raise ValueError("Couldn't determine default command for command type '%s' =(" % (command_t,))
+    return factory()
@@ -1,8 +1,8 @@
-import re
 from dataclasses import dataclass
-from typing import Any, Optional, List, Set, Collection
+from operator import itemgetter
+from typing import Any, Set, Collection
 
-from pydantic import BaseModel, ValidationError
+from pydantic import ValidationError
 
 
 def class_name(cls: Any) -> str:
@@ -18,26 +18,13 @@ def class_name(cls: Any) -> str:
         return str(cls)
 
 
-# Quick json model to parse in the errors attached to the ValidationError.
-class _ErrorModel(BaseModel):
-    loc: List[str]
-    msg: str
-    type: str
-    ctx: Any
-
-
 # Quick model to extract the location & type of error for hashing into a set.
 # We use dataclass instead of BaseModel because BaseModel isn't hashable.
 @dataclass(eq=True, frozen=True)
 class _PatternError:
-    type: str
     loc: str
     regex: str
 
-    def __post_init__(self):
-        if not self.type or not re.fullmatch(r'value_error\.str\.regex', self.type):
-            raise ValueError("Expected 'type' field to match 'value_error.str.regex', got '%s'" % (self.type,))
-
 
 @dataclass(eq=True, frozen=True)
 class _OtherError:
@@ -46,17 +33,10 @@ class _OtherError:
     type: str
 
 
-def _try_pattern_error_from(em: _ErrorModel) -> Optional[_PatternError]:
-    try:
-        return _PatternError(type=em.type,
-                             loc=".".join(em.loc),
-                             regex=em.ctx.get("pattern", None) if em.ctx else None)
-    except ValueError:
-        return None
-
+_PATTERN_ERROR_TYPE = "value_error.str.regex"
 
-def _other_error_from(em: _ErrorModel) -> _OtherError:
-    return _OtherError(loc=".".join(em.loc), msg=em.msg, type=em.type)
+# Pulls the fields we care about out of each of ValidationError.errors() in one call.
+_get_error_fields = itemgetter("type", "loc", "msg")
 
 
 def simplify_validation_error(e: ValidationError):
@@ -71,13 +51,18 @@ def simplify_validation_error(e: ValidationError):
 
     pattern_err_set: Set[_PatternError] = set()
     other_err_set: Set[_OtherError] = set()
+    # Bound locally, since this loop runs once per error, and a failed overload can produce a lot of them.
+    add_pattern_err = pattern_err_set.add
+    add_other_err = other_err_set.add
     for err in e.errors():
-        em = _ErrorModel(**err)
-        pm = _try_pattern_error_from(em)
-        if pm:
-            pattern_err_set.add(pm)
+        err_type, loc, msg = _get_error_fields(err)
+        # Locations can contain list indices as well as field names.
+        loc_str = ".".join(map(str, loc))
+        if err_type == _PATTERN_ERROR_TYPE:
+            ctx = err.get("ctx")
+            add_pattern_err(_PatternError(loc=loc_str, regex=ctx.get("pattern", None) if ctx else None))
             continue
-        other_err_set.add(_other_error_from(em))
+        add_other_err(_OtherError(loc=loc_str, msg=msg, type=err_type))
 
     pattern_err_strings = list(
         "\t'%s': '%s'" % (p_em.loc, p_em.regex) for p_em in pattern_err_set
@@ -5,8 +5,9 @@ These commandline commands perform basic functionality for controlling the media
 basic testing from the command line, as well as configuration and scripting for users who know what they're doing.
 """
 
-import json
+import asyncio
 import pathlib
+from typing import List
 
 from common.command import Command
 from common.exceptions import UserException
@@ -26,10 +27,14 @@ class ListAudioDevices(Command):
 
     def __init__(self, controller: Controller):
         ap = SafeArgumentParser(description="List audio devices")
+        ap.add_argument("--refresh", action="store_true",
+                        help="Look for new audio devices, instead of listing the ones already found")
         super().__init__("listdevices", ap)
         self.controller = controller
 
-    def do_function(self):
+    def do_function(self, refresh=False):
+        if refresh:
+            self.controller.refresh_devices()
         print_msg("Devices: %s" % (self.controller.list_devices()))
 
 
@@ -206,6 +211,22 @@ class ListPlaylists(Command):
             print_msg("  %s: %s" % (playlist[0], playlist[1]))
 
 
+def _library_path(library_name) -> pathlib.Path:
+    """Returns the path SaveLibrary and LoadLibrary use for the library with the given name."""
+    if library_name == "" or library_name is None:
+        raise IllegalArgument("Expected a name for the library. Instead got '%s'" % (library_name,))
+    return pathlib.Path.cwd().joinpath("Media Libraries").joinpath(library_name + ".json")
+
+
+def _write_library(lib_path: pathlib.Path, data: bytes):
+    lib_path.parent.mkdir(parents=True, exist_ok=True)
+    lib_path.write_bytes(data)
+
+
+def _read_library(lib_path: pathlib.Path) -> media_library.MediaLibrary:
+    return media_library.MediaLibrary.loads(lib_path.read_bytes())
+
+
 class SaveLibrary(Command):
     """Save the current library to a file in the MediaLibrary sub-folder."""
 
@@ -217,16 +238,16 @@ class SaveLibrary(Command):
         self.controller = controller
 
     def do_function(self, library_name=""):
-        if library_name == "" or library_name is None:
-            raise IllegalArgument("Expected a name for the library. Instead got '%s'" % (library_name,))
+        _write_library(_library_path(library_name), self.controller.media_library.dumps())
 
-        json_str = json.dumps(self.controller.media_library.to_primitive())
-        lib_path = pathlib.Path.cwd().joinpath("Media Libraries").joinpath(library_name + ".json")
-        lib_path.parent.mkdir(parents=True, exist_ok=True)
+    async def process_async(self, argv: List[str]):
+        """Like process(), but writes the file on the event loop's executor.
 
-        file = open(lib_path, mode="w")
-        file.write(json_str)
-        file.close()
+        The library is serialized on the calling thread first, so the executor never reads it while it's being changed.
+        """
+        lib_path = _library_path(self._parse(argv).library_name)
+        data = self.controller.media_library.dumps()
+        await asyncio.get_running_loop().run_in_executor(None, _write_library, lib_path, data)
 
 
 class LoadLibrary(Command):
@@ -240,14 +261,17 @@ class LoadLibrary(Command):
         self.controller = controller
 
     def do_function(self, library_name=""):
-        if library_name == "" or library_name is None:
-            raise IllegalArgument("Expected a name for the library. Instead got '%s'" % (library_name,))
+        self.controller.media_library.copy_from(_read_library(_library_path(library_name)))
+
+    async def process_async(self, argv: List[str]):
+        """Like process(), but reads the file on the event loop's executor.
 
-        lib_path = pathlib.Path.cwd().joinpath("Media Libraries").joinpath(library_name + ".json")
-        file = open(lib_path, mode="r")
-        json_str = file.read()
-        ml_primitive = json.loads(json_str)
-        self.controller.media_library.copy_from(media_library.MediaLibrary.from_primitive(ml_primitive))
+        The loaded library is only copied into the current one back on the calling thread, so the executor never
+        changes the library while something else is using it.
+        """
+        lib_path = _library_path(self._parse(argv).library_name)
+        loaded = await asyncio.get_running_loop().run_in_executor(None, _read_library, lib_path)
+        self.controller.media_library.copy_from(loaded)
 
 
 class DescribeSong(Command):
@@ -266,5 +290,6 @@ class DescribeSong(Command):
         if description == "" or description is None:
             raise IllegalArgument("Expected a description for the song. Instead got '%s'" % (description,))
         song = self.controller.media_library.get_song(song_alias)
-        song.description = description
-        self.controller.media_library.add_song(song, expect_overwrite=True)
+        # Songs are immutable, so swap in a described copy.
+        described_song = media_library.Song(alias=song.alias, uri=song.uri, description=description)
+        self.controller.media_library.add_song(described_song, expect_overwrite=True)
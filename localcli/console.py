@@ -9,49 +9,115 @@ As a result,
 
 from __future__ import generators
 
+import asyncio
 import collections
+import os
+import queue
+import re
 import shlex
 import sys
 import threading
-import time
-from queue import Queue
-from typing import Optional, Generator
+from typing import Optional, Generator, AsyncGenerator, List, Deque, NamedTuple, Sequence
 
 
 def echo(argv):
     print(argv.join(" "))
 
 
-Command = collections.namedtuple("Command", ("command", "arguments"), defaults=[list])
+class Command(NamedTuple):
+    """A single parsed line of console input.
+
+    Kept as a tuple rather than a class with attributes, since one of these is created for every line of input.
+    """
+    command: str
+    # Commands without arguments share the empty tuple, rather than each allocating their own list.
+    arguments: Sequence[str] = ()
+
+
+# Matches one whitespace-separated token - a single-quoted string, a double-quoted string, or a bare word - along with
+# the whitespace around it. Whitespace is spelled out as shlex's, since \s would also split on e.g. non-breaking spaces.
+# Backslashes are escapes outside of single quotes, so anything with one in it is left to shlex.
+_TOKEN_RE = re.compile(r"""[ \t\r\n]*(?:'([^']*)'|"([^"\\]*)"|([^ \t\r\n'"\\]+))(?:[ \t\r\n]+|$)""")
+
+
+def split_input(console_input: str) -> List[str]:
+    """Splits a line of console input into arguments, the same way shlex.split(posix=True) would.
+
+    Most input is just words and simple quoted strings, which are split with a single regex scan. Anything fancier
+    (escapes, quotes glued onto other text, unbalanced quotes) is left to shlex.
+    """
+    values = []
+    pos = 0
+    for match in _TOKEN_RE.finditer(console_input):
+        if match.start() != pos:
+            break
+        single_quoted, double_quoted, bare = match.groups()
+        if single_quoted is not None:
+            values.append(single_quoted)
+        elif double_quoted is not None:
+            values.append(double_quoted)
+        else:
+            values.append(bare)
+        pos = match.end()
+    else:
+        if pos == len(console_input):
+            return values
+    return shlex.split(console_input, comments=False, posix=True)
+
+
+def parse_command(console_input: str) -> Optional[Command]:
+    """Parses a single line of console input into a Command, or None if the line has nothing meaningful in it."""
+    if not console_input.strip():
+        return None
+    values = split_input(console_input)
+    return Command(command=values[0], arguments=values[1:])
+
+
+# How much input to read at once when the event loop says the input's file descriptor is readable.
+_READ_SIZE = 4096
 
 
 class ConsoleOutput(object):
     """Holds output from the console object."""
 
-    def __init__(self, queue: Queue):
-        self.queue = queue
+    def __init__(self, maxsize: int = 32):
+        # A plain deque guarded by a single condition variable - queue.Queue takes several locks per put/get, which adds
+        # up when commands are scripted in bulk.
+        self._commands: Deque[Command] = collections.deque()
+        self._condition = threading.Condition()
+        # Lets the console read ahead while a command runs, but stops a huge paste from piling up without bound.
+        self._maxsize = maxsize
         self.terminate = False
 
     def commands(self, timeout: Optional[float] = None) -> Generator[Command, None, None]:
-        """Yields commands in a blocking fashion as a generator object."""
+        """Yields commands in a blocking fashion as a generator object.
+
+        Raises queue.Empty if no command arrives within the timeout, if given.
+        """
         while not self.terminate:
-            c = self.queue.get(block=True, timeout=timeout)
+            with self._condition:
+                if not self._condition.wait_for(lambda: self._commands or self.terminate, timeout=timeout):
+                    raise queue.Empty()
+                if not self._commands:
+                    return
+                c = self._commands.popleft()
+                self._condition.notify_all()
             if c.command == "exit":
                 return
             yield c
-            self.queue.task_done()
 
     def add_command(self, command: Command):
-        """Add a command to be processed"""
-        self.queue.put(command)
-
-    def join(self):
-        """Wait for all inputs to finish processing."""
-        self.queue.join()
+        """Add a command to be processed, blocking while the queue is full."""
+        with self._condition:
+            self._condition.wait_for(lambda: len(self._commands) < self._maxsize or self.terminate)
+            self._commands.append(command)
+            self._condition.notify_all()
 
     def close(self):
         """Append an "exit" to the end of the queue"""
-        self.queue.put(Command(command="exit", arguments=[]))
+        with self._condition:
+            self._commands.append(Command(command="exit"))
+            self._condition.notify_all()
 
 
 class Console(object):
@@ -67,8 +133,8 @@ class Console(object):
     def __init__(self, console_input=sys.stdin, output=sys.stdout):
         self.output = output
         self.input = console_input
-        self.console_output = ConsoleOutput(Queue())
-        self.readline_output = Queue()
+        self.console_output = ConsoleOutput()
+        self.readline_output: queue.SimpleQueue = queue.SimpleQueue()
 
     def start(self) -> ConsoleOutput:
         """Begins processing input, returns a ConsoleOutput object, which contains all the post-processed output."""
@@ -78,6 +144,73 @@ class Console(object):
 
         return self.console_output
 
+    async def async_commands(self) -> AsyncGenerator[Command, None]:
+        """Yields commands read from the input, waiting on the running event loop rather than a reader thread.
+
+        On POSIX the event loop watches the input's file descriptor itself, and lines are only decoded once they're
+        complete. Inputs the loop can't watch (Windows consoles, regular files, objects without a file descriptor) fall
+        back to start()'s reader thread, waited on through the loop's executor. Stops at end of input, or once an
+        "exit" command is read.
+        """
+        loop = asyncio.get_running_loop()
+        reader = self._input_reader(loop)
+        if reader is None:
+            commands = self.start().commands()
+            while True:
+                command = await loop.run_in_executor(None, next, commands, None)
+                if command is None:
+                    return
+                yield command
+
+        encoding = getattr(self.input, "encoding", None) or "utf-8"
+        try:
+            while True:
+                self.output.write(">>> ")
+                self.output.flush()
+                line = await reader.readline()
+                if not line:
+                    return
+                console_input = line.decode(encoding, errors="replace")
+                try:
+                    command = parse_command(console_input)
+                except ValueError as e:
+                    # e.g. unbalanced quotes - let the user try again, rather than ending the console.
+                    self.write("Couldn't parse '%s': %s" % (console_input.rstrip("\n"), e))
+                    continue
+                if command is None:
+                    continue
+                if command.command == "exit":
+                    return
+                yield command
+        finally:
+            loop.remove_reader(self.input.fileno())
+
+    def _input_reader(self, loop: asyncio.AbstractEventLoop) -> Optional[asyncio.StreamReader]:
+        """Has the event loop feed the input into a StreamReader, or returns None if the loop can't watch the input."""
+        if sys.platform == "win32":
+            return None
+        try:
+            fd = self.input.fileno()
+        except (AttributeError, OSError, ValueError):
+            return None
+        reader = asyncio.StreamReader()
+
+        def on_readable():
+            # The loop only calls this once there's something to read, so this doesn't block.
+            data = os.read(fd, _READ_SIZE)
+            if data:
+                reader.feed_data(data)
+            else:
+                loop.remove_reader(fd)
+                reader.feed_eof()
+
+        try:
+            loop.add_reader(fd, on_readable)
+        except (NotImplementedError, OSError, ValueError):
+            # Regular files can't be registered with epoll, for instance.
+            return None
+        return reader
+
     def write(self, message):
         """Write a message to output to the user.."""
         self.output.write(message + "\n")
@@ -86,14 +219,11 @@ class Console(object):
     def close(self):
         """Force this console to terminate itself.
 
-        This function has the courtesy to flush before leaving.
+        This function has the courtesy to flush before leaving: any input that's already been read is turned into
+        commands ahead of the "exit", so nothing is preempted.
         """
-        self.input.flush()
-        # Super hacky, but: We're only working on a single logical thread. We need to give up control to
-        # the event manager to ensure the flush above gets processed before putting "exit" on the queue
-        # to avoid preempting anything =/
-        time.sleep(.0025)
-        self.console_output.queue.put(Command(command="exit", arguments=[]))
+        self.process_readline(self.console_output)
+        self.console_output.close()
 
     def process_readline(self, console_out: ConsoleOutput):
         """Process all currently queued inputs.
@@ -101,15 +231,17 @@ class Console(object):
         This reads from readline_output, which allows for backchannel input buffering (e.g. queuing inputs manually
         through readline_output instead of having the user do it through stdin)
         """
-        while not self.readline_output.empty():
-            console_input = self.readline_output.get()
+        get_nowait = self.readline_output.get_nowait
+        while True:
+            try:
+                console_input = get_nowait()
+            except queue.Empty:
+                return
+            command = parse_command(console_input)
 
             # User didn't enter anything meaningful...
-            if not console_input.strip():
+            if command is None:
                 continue
-
-            values = shlex.split(console_input, comments=False, posix=True)
-            command = Command(command=values[0], arguments=values[1:])
             console_out.add_command(command)
 
     def _run(self, console_out: ConsoleOutput):
@@ -121,6 +253,10 @@ class Console(object):
         while True:
             self.output.write(">>> ")
             self.output.flush()
-            self.readline_output.put(self.input.readline())
+            line = self.input.readline()
+            if not line:
+                # End of input (e.g. ctrl+D) - nothing more is coming, so let the command consumer finish up.
+                self.close()
+                return
+            self.readline_output.put(line)
             self.process_readline(console_out)
-            console_out.join()
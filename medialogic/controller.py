@@ -6,7 +6,7 @@ the finicky hacky bits required to deal with the vlc library directly.
 This is also a good layer to reimplement if you want to provide multiple audio backends (e.g. Spotipy).
 """
 
-from typing import List, Optional, Dict
+from typing import Iterator, Optional, Dict
 
 import vlc  # type: ignore
 from vlc import AudioOutputDevice
@@ -30,10 +30,16 @@ class AudioDevice(object):
     """
 
     def __init__(self, audio_output_device: AudioOutputDevice):
-        self.contents = audio_output_device.contents
+        # Copied out of the ctypes struct up front, since every field access on it goes through ctypes.
+        contents = audio_output_device.contents
+        self.description = bytes(contents.description)
+        self.device = bytes(contents.device)
+        # Decoded once up front, since devices get printed over and over while the user picks one.
+        self._description = str(self.description, DEFAULT_ENCODING)
+        self.device_name = str(self.device, DEFAULT_ENCODING)
 
     def __str__(self):
-        return str(self.contents.description, DEFAULT_ENCODING)
+        return self._description
 
     def __repr__(self):
         return str(self)
@@ -58,14 +64,14 @@ class AudioDevices(object):
           devices.
         """
         self.device_list_ptr = audio_device_enum
-        device_list = AudioDevices._build_devices(audio_device_enum)
         # The user uses this map to say "I want to play on device 3" instead of "I want to play on device <hex garbage>"
-        self.user_device_map = {idx: device for idx, device in enumerate(device_list)}
-
+        self.user_device_map: Dict[int, AudioDevice] = {}
         # This maps system device names back to real devices. "None" equates to "default"
-        self.device_name_map: Dict[Optional[str], Optional[AudioDevice]] = {None: self.user_device_map.get(0, None)}
-        for device in device_list:
-            self.device_name_map[str(device.contents.device, DEFAULT_ENCODING)] = device
+        self.device_name_map: Dict[Optional[str], Optional[AudioDevice]] = {None: None}
+        for idx, device in enumerate(AudioDevices._build_devices(audio_device_enum)):
+            self.user_device_map[idx] = device
+            self.device_name_map[device.device_name] = device
+        self.device_name_map[None] = self.user_device_map.get(0, None)
 
         self._valid = True
 
@@ -111,18 +117,16 @@ class AudioDevices(object):
         return self.device_name_map[device_name]
 
     @staticmethod
-    def _build_devices(audio_output_device: AudioOutputDevice) -> List[AudioDevice]:
-        """Build a list of audio devices as passed in through VLC
+    def _build_devices(audio_output_device: AudioOutputDevice) -> Iterator[AudioDevice]:
+        """Yields the audio devices as passed in through VLC
 
-        VLC uses a linked list to pass around Audio Devices. As a result, we need to build the actual list by traversing
-        the linked list and turning it into a python list so there's a bit more sane way to refer to devices.
+        VLC uses a linked list to pass around Audio Devices. As a result, we need to traverse the linked list to get
+        at each device, so there's a bit more sane way to refer to devices.
         """
         cur = audio_output_device
-        output = []
         while cur:
-            output.append(AudioDevice(cur))
+            yield AudioDevice(cur)
             cur = cur.contents.next
-        return output
 
 
 class Controller(object):
@@ -153,11 +157,13 @@ class Controller(object):
     """
 
     def __init__(self, media_library: Optional[MediaLibrary] = None):
-        if not media_library:
+        if media_library is None:
             media_library = MediaLibrary()
         self.media_library = media_library
         self.vlc_player = Player()
-        self.devices = AudioDevices(vlc.libvlc_audio_output_device_enum(self.vlc_player.mp))
+        # Enumerating devices is slow and they rarely change, so the list is only built on first use, and only rebuilt
+        # when asked to by refresh_devices() (e.g. "listdevices --refresh" on the local CLI).
+        self._devices: Optional[AudioDevices] = None
         self.switch_oracle = oracles.SwitchOracle()
         self.queueing_oracle = oracles.ChainOracle()
         self.interrupt_oracle = oracles.InterruptOracle(self.switch_oracle)
@@ -171,7 +177,7 @@ class Controller(object):
         :param song_alias: Refers to an alias in the media library to interrupt literally everything and play now.
         """
         songs = self.media_library.get(song_alias)
-        self.queueing_oracle = oracles.ChainOracle()
+        self.queueing_oracle.reset()
         self.switch_oracle.set_oracle(self.queueing_oracle)
         self.queueing_oracle.add(oracles.PlaylistOracle(songs))
         self.interrupt_oracle.clear_interrupt()
@@ -215,15 +221,32 @@ class Controller(object):
         songs = self.media_library.get(alias)
         self.queueing_oracle.add(oracles.RepeatingOracle(songs, times))
 
+    @property
+    def devices(self) -> AudioDevices:
+        """The audio devices known to VLC, enumerated the first time they're needed."""
+        if self._devices is None:
+            return self.refresh_devices()
+        return self._devices
+
+    def refresh_devices(self) -> AudioDevices:
+        """Re-enumerates the audio devices from VLC, e.g. after a device was plugged in. Returns the new devices."""
+        if self._devices is not None:
+            self._devices.free()
+        devices = AudioDevices(vlc.libvlc_audio_output_device_enum(self.vlc_player.mp))
+        self._devices = devices
+        return devices
+
     def list_devices(self) -> str:
-        """Lists the current audio devices as a string."""
-        self.devices.free()
-        self.devices = AudioDevices(vlc.libvlc_audio_output_device_enum(self.vlc_player.mp))
+        """Lists the current audio devices as a string.
+
+        This is the list as of the last refresh_devices() call - devices plugged in since then won't show up until the
+        next one.
+        """
         return str(self.devices)
 
     def set_device(self, device_idx):
         """Sets the current device using an int index based on 'list_devices' string."""
-        self.vlc_player.set_device(self.devices.device_for_index(device_idx).contents.device)
+        self.vlc_player.set_device(self.devices.device_for_index(device_idx).device)
 
     def get_device(self):
         """Gets a string that describes the audio output devices."""
@@ -2,18 +2,62 @@
 This module defines objects used to manage a media library pointing at audio files in a file system.
 """
 
+import functools
+import itertools
 import os
-from typing import List, Dict, Tuple, Any
+import sys
+from collections import Counter, defaultdict
+from operator import itemgetter
+from typing import List, Dict, Tuple, Any, Iterable, DefaultDict, Union, Optional
+
+import orjson
 
 from common.exceptions import UserException, SystemException
 
 
+@functools.lru_cache(maxsize=8192)
+def _isfile_cached(song_uri: str) -> bool:
+    """os.path.isfile, remembered per uri - the same uris get checked over and over as songs are re-added.
+
+    Call _isfile_cached.cache_clear() if files are deleted out from under the library (e.g. in tests).
+    """
+    return os.path.isfile(song_uri)
+
+
 def _check_file_exists(song_uri):
-    if os.path.isfile(song_uri):
+    # Misses are re-checked uncached, so a file created after a failed check is still found.
+    if _isfile_cached(song_uri) or os.path.isfile(song_uri):
         return
     raise NotFoundException("Could not find file '%s'" % (song_uri,))
 
 
+def _check_files_exist(song_uris: Iterable[str]):
+    """Checks a whole batch of files exist, raising a NotFoundException listing every one that doesn't.
+
+    Each directory is listed once, rather than stat-ing every file individually - this is what keeps loading a big
+    library fast. Anything not spotted in its directory listing is double checked with isfile(), so the result is the
+    same as calling _check_file_exists on each uri.
+    """
+    uris_by_directory: Dict[str, List[str]] = defaultdict(list)
+    for song_uri in song_uris:
+        uris_by_directory[os.path.dirname(song_uri)].append(song_uri)
+
+    missing = []
+    for directory, directory_uris in uris_by_directory.items():
+        try:
+            with os.scandir(directory or os.curdir) as entries:
+                file_names = set(os.path.normcase(entry.name) for entry in entries if entry.is_file())
+        except OSError:
+            file_names = set()
+        for song_uri in directory_uris:
+            if os.path.normcase(os.path.basename(song_uri)) in file_names or os.path.isfile(song_uri):
+                continue
+            missing.append(song_uri)
+
+    if missing:
+        raise NotFoundException("Could not find files: '%s'" % (missing,))
+
+
 class BadFormatException(SystemException):
     pass
 
@@ -21,18 +65,42 @@ class BadFormatException(SystemException):
 VERSION_FIELD = "version"
 
 
+def _primitive_version(primitive: Dict[str, Any]) -> float:
+    """Returns the version number of a primitive, making sure it actually is a number.
+
+    JSON round trips don't reliably keep 1.0 as a float, so ints are accepted too - but not bools, despite those
+    technically being ints.
+    """
+    version = primitive[VERSION_FIELD]
+    if isinstance(version, bool) or not isinstance(version, (int, float)):
+        raise BadFormatException("Invalid primitive '%s': bad version field. Expected float, got '%s'." % (
+            primitive, type(version).__name__))
+    return version
+
+
 class Song(object):
     """Represents a single song, to be fed into the Media Library."""
     VERSION = 1.0
     ALIAS_FIELD = "alias"
     URI_FIELD = "uri"
     DESCRIPTION_FIELD = "description"
-
-    def __init__(self, alias: str, uri: str, description: str = ""):
-        self.alias = alias
-        _check_file_exists(uri)
-        self.uri = uri
-        self.description = description
+    # Libraries can hold a lot of songs, so skip the per-instance __dict__.
+    __slots__ = ("alias", "uri", "description", "_primitive")
+    alias: str
+    uri: str
+    description: str
+    _primitive: Optional[Dict[str, Any]]
+
+    def __init__(self, alias: str, uri: str, description: str = "", verify: bool = True):
+        """Creates a song. Pass verify=False to skip checking the file exists, e.g. to check a batch at once instead."""
+        # Songs are immutable (see __setattr__), so fields are set directly on the object.
+        # Aliases are interned, since the same alias gets repeated across playlists and used as a key everywhere.
+        object.__setattr__(self, "alias", sys.intern(alias))
+        if verify:
+            _check_file_exists(uri)
+        object.__setattr__(self, "uri", uri)
+        object.__setattr__(self, "description", description)
+        object.__setattr__(self, "_primitive", None)
 
     def __str__(self):
         return "Song{alias: '%s', uri: '%s', description: '%s'}" % (self.alias, self.uri, self.description)
@@ -41,28 +109,39 @@ class Song(object):
         return str(self)
 
     @staticmethod
-    def parse_v1(primitive: Dict[str, object]):
+    def parse_v1(primitive: Dict[str, object], verify: bool = True):
         """Used to parse the first serialization version of a song from json."""
-        return Song(str(primitive["alias"]), str(primitive["uri"]), str(primitive.get("description", "")))
+        return Song(str(primitive["alias"]), str(primitive["uri"]), str(primitive.get("description", "")), verify)
+
+    def __setattr__(self, name, value):
+        # Songs are shared straight out of the library rather than defensively copied, so they can't be changed.
+        if name != "_primitive":
+            raise AttributeError("Song objects are immutable, can't set '%s'. Create a new Song instead." % (name,))
+        object.__setattr__(self, name, value)
 
     def to_primitive(self) -> Dict[str, object]:
-        """Transforms 'self' to a dict that can be serialized."""
-        return {
-            VERSION_FIELD: self.VERSION,
-            Song.ALIAS_FIELD: self.alias,
-            Song.URI_FIELD: self.uri,
-            Song.DESCRIPTION_FIELD: self.description if self.description is not None else "",
-        }
+        """Transforms 'self' to a dict that can be serialized.
+
+        The dict is built once and then cached, so treat it as read-only.
+        """
+        if self._primitive is None:
+            self._primitive = {
+                VERSION_FIELD: self.VERSION,
+                Song.ALIAS_FIELD: self.alias,
+                Song.URI_FIELD: self.uri,
+                Song.DESCRIPTION_FIELD: self.description if self.description is not None else "",
+            }
+        return self._primitive
 
     @staticmethod
-    def from_primitive(primitive: Dict[str, object]):
+    def from_primitive(primitive: Dict[str, object], verify: bool = True):
         """Transforms a dict (presumably read from json) into a Song object."""
-        version = primitive[VERSION_FIELD]
-        if not isinstance(version, float):
-            raise BadFormatException("Invalid primitive '%s': bad version field. Expected float, got '%s'." % (
-                primitive, type(version).__name__))
-
-        return SONG_VERSION_PARSER[version](primitive)
+        # When we update the logic required to serialize a song, add a branch here for the new version so older
+        # primitives still get turned into song objects.
+        version = _primitive_version(primitive)
+        if version == 1.0:
+            return Song.parse_v1(primitive, verify)
+        raise BadFormatException("Invalid primitive '%s': unsupported song version '%s'." % (primitive, version))
 
     def __eq__(self, other):
         """We explicitly ignore the "description" field because it's not a 'key'."""
@@ -71,12 +150,34 @@ class Song(object):
         if self.alias == other.alias and self.uri == other.uri:
             return True
 
+    def __hash__(self):
+        return hash((self.alias, self.uri))
+
+
+def _orjson_default(obj: Any) -> Any:
+    """Tells orjson how to serialize library objects it doesn't know about."""
+    if isinstance(obj, Song):
+        return obj.to_primitive()
+    raise TypeError("Can't serialize object '%s' of type '%s'" % (obj, type(obj).__name__))
+
 
-# We use this dict so that, when we update the logic required to serialize a song, we can
-# use the appropriate function to turn it into a song object.
-SONG_VERSION_PARSER = {
-    1.0: Song.parse_v1
-}
+class _Preview(object):
+    """Stands in for a (possibly huge) collection in an error message, showing only its first few items.
+
+    Those items are copied out when the error is raised, so the message shows the collection as it was then, even if
+    it changes afterwards. Like the rest of the message, they're only formatted if the message is actually read.
+    """
+    LIMIT = 20
+
+    def __init__(self, collection: Iterable[Any]):
+        # One past the limit, to tell whether there's anything left out.
+        self.items = tuple(itertools.islice(collection, self.LIMIT + 1))
+
+    def __str__(self):
+        items = list(self.items)
+        if len(items) > self.LIMIT:
+            return "%s, ...]" % (str(items[:self.LIMIT])[:-1],)
+        return str(items)
 
 
 class NotFoundException(UserException):
@@ -100,7 +201,9 @@ class MediaLibrary(object):
 
     This makes it easier to reference songs & playlists using short, human-readable phrases instead of goddamn URIs...
 
-    Makes defensive copies on every "get" function.
+    Makes defensive copies on every "get" function, except for songs - those are immutable, so they're shared.
+
+    Songs and song aliases are type-checked exactly: subclasses of Song or str are rejected.
      """
 
     # Version number. Always update when updating to_primitives.
@@ -110,7 +213,15 @@ class MediaLibrary(object):
 
     def __init__(self):
         self.song_map = {}
-        self.playlists = {}
+        self.playlists: Dict[str, List[str]] = {}
+        # Read-only copies of playlists handed out by get_playlist. Entries are dropped whenever a playlist changes.
+        self._playlist_cache: Dict[str, Tuple[str, ...]] = {}
+        # Reverse index of song alias -> the names of the playlists it's in, counting how many times it's in each. A
+        # song can be dropped from every playlist without scanning all of them, and checking whether a playlist holds a
+        # song doesn't need to scan the playlist.
+        self._song_playlists: DefaultDict[str, Counter[str]] = defaultdict(Counter)
+        # The json written by the last dumps() call, kept until the library changes so repeat saves are free.
+        self._dumps_cache: Optional[bytes] = None
 
     def to_primitive(self) -> Dict[str, object]:
         """Dump to a json-dump-able object"""
@@ -121,6 +232,25 @@ class MediaLibrary(object):
             MediaLibrary.PLAYLIST_FIELD: self.playlists,
         }
 
+    def dumps(self) -> bytes:
+        """Serializes the library to json.
+
+        This produces the same json as dumping to_primitive(), but songs are handed straight to orjson rather than
+        building the whole primitive tree up front. The result is cached until the library next changes.
+        """
+        if self._dumps_cache is None:
+            self._dumps_cache = orjson.dumps({
+                VERSION_FIELD: self.VERSION,
+                MediaLibrary.SONGS_FIELD: list(self.song_map.values()),
+                MediaLibrary.PLAYLIST_FIELD: self.playlists,
+            }, default=_orjson_default)
+        return self._dumps_cache
+
+    @staticmethod
+    def loads(data: Union[bytes, str]):
+        """Creates a MediaLibrary object from json, as written by dumps()."""
+        return MediaLibrary.from_primitive(orjson.loads(data))
+
     def __str__(self):
         return "MediaLibrary%s" % (self.to_primitive(),)
 
@@ -135,46 +265,77 @@ class MediaLibrary(object):
     @staticmethod
     def from_primitive(primitive: Dict[str, object]):
         """Creates a MediaLibrary object from an input primitive dict."""
-        version = primitive[VERSION_FIELD]
-        if not isinstance(version, float):
-            raise BadFormatException("Invalid primitive '%s': bad version field. Expected float, got '%s'." % (
-                primitive, type(version).__name__))
-
-        return MEDIA_LIBRARY_VERSION_PARSER[version](primitive)
+        # Add a branch here for each new schema version.
+        version = _primitive_version(primitive)
+        if version == 1.0:
+            return MediaLibrary.parse_v1(primitive)
+        raise BadFormatException("Invalid primitive '%s': unsupported media library version '%s'." % (
+            primitive, version))
 
     @staticmethod
     def parse_v1(primitive: Dict[str, Any]):
         """Parses a MediaLibrary object from a dict using the v1 schema."""
         ml = MediaLibrary()
-        songs = [Song.from_primitive(song) for song in primitive.get(MediaLibrary.SONGS_FIELD, [])]
-        ml.song_map = dict((song.alias, song) for song in songs)
-        ml.playlists = primitive.get(MediaLibrary.PLAYLIST_FIELD, [])
+        song_map = ml.song_map
+        # Nearly every song in a library shares the current version, so those are handed straight to the matching
+        # parser rather than going back through from_primitive's checks and dispatch for each one.
+        parse_song_v1 = Song.parse_v1
+        for song_primitive in primitive.get(MediaLibrary.SONGS_FIELD, ()):
+            if type(song_primitive.get(VERSION_FIELD)) is float and song_primitive[VERSION_FIELD] == 1.0:
+                song = parse_song_v1(song_primitive, False)
+            else:
+                song = Song.from_primitive(song_primitive, verify=False)
+            song_map[song.alias] = song
+        _check_files_exist(song.uri for song in song_map.values())
+        ml.playlists = {name: [sys.intern(song_alias) for song_alias in playlist]
+                        for name, playlist in primitive.get(MediaLibrary.PLAYLIST_FIELD, {}).items()}
+        ml._index_playlists()
         return ml
 
+    def _index_playlists(self) -> None:
+        """Rebuilds the song -> playlists index from scratch."""
+        self._song_playlists.clear()
+        for name, playlist in self.playlists.items():
+            for song_alias in playlist:
+                self._song_playlists[song_alias][name] += 1
+
     def add_song(self, song: Song, expect_overwrite: bool = False) -> None:
         """Add a song from the song map. Use the stored alias as the alias in the map."""
-        if not isinstance(song, Song):
+        if type(song) is not Song:
             raise IllegalArgument("Expected object '%s' to be a Song object, instead got a '%s'" %
                                   (song, type(song).__name__))
         if song.alias in self.song_map and not expect_overwrite:
             raise AlreadyExistsException(
                 "Song '%s' already exists in the library as '%s'" % (song, self.song_map[song.alias]))
         self.song_map[song.alias] = song
+        self._dumps_cache = None
 
     def copy_from(self, other) -> None:
         self.playlists.clear()
         self.song_map.clear()
+        self._playlist_cache.clear()
 
-        self.playlists.update(other.playlists)
+        self.playlists.update((name, list(playlist)) for name, playlist in other.playlists.items())
         self.song_map.update(other.song_map)
+        self._index_playlists()
+        self._dumps_cache = None
+
+    def remove_song(self, song_alias: str) -> None:
+        """Removes a song from the library, along with its entries in every playlist."""
+        if song_alias not in self.song_map:
+            raise NotFoundException("Couldn't find song '%s'", song_alias)
+        del self.song_map[song_alias]
+        self._dumps_cache = None
+        for playlist_name in self._song_playlists.pop(song_alias, ()):
+            self.playlists[playlist_name] = [alias for alias in self.playlists[playlist_name] if alias != song_alias]
+            self._playlist_cache.pop(playlist_name, None)
 
     def get_song(self, song_alias: str) -> Song:
         """Returns a song from the map."""
         if song_alias not in self.song_map:
-            raise NotFoundException(
-                "Could not find song '%s' in map of songs: '%s'" % (song_alias, self.song_map.keys()))
-        song = self.song_map[song_alias]
-        return Song(alias=song.alias, uri=song.uri)
+            raise NotFoundException("Could not find song '%s' in map of songs: '%s'",
+                                    song_alias, _Preview(self.song_map))
+        return self.song_map[song_alias]
 
     def list_songs(self) -> List[Song]:
         """Lists all songs as Song objects in the current library.
@@ -185,27 +346,40 @@ class MediaLibrary(object):
 
     def list_playlists(self) -> List[Tuple[str, List[str]]]:
         """Lists all playlists. Returns a list of tuples containing the Playlist name and a list of Song aliases."""
-        return sorted(list((key, self.playlists[key]) for key in self.playlists.keys()), key=lambda t: t[0])
+        return sorted(((name, list(playlist)) for name, playlist in self.playlists.items()), key=itemgetter(0))
 
-    def get_playlist(self, playlist_name: str) -> List[str]:
-        """Returns a list of songs for the corresponding input playlist name."""
-        if playlist_name not in self.playlists:
-            raise NotFoundException("Playlist '%s' not found in playlist collection '%s'" % (
-                playlist_name, self.playlists.keys()))
-        return list(self.playlists[playlist_name])
+    def get_playlist(self, playlist_name: str) -> Tuple[str, ...]:
+        """Returns the songs for the corresponding input playlist name.
+
+        The playlist is returned as a tuple so it can't be changed by the caller, and the same tuple is returned until
+        the playlist changes.
+        """
+        playlist = self._playlist_cache.get(playlist_name, None)
+        if playlist is None:
+            if playlist_name not in self.playlists:
+                raise NotFoundException("Playlist '%s' not found in playlist collection '%s'",
+                                        playlist_name, _Preview(self.playlists))
+            playlist = self._playlist_cache[playlist_name] = tuple(self.playlists[playlist_name])
+        return playlist
 
     def get(self, name: str) -> List[str]:
         """Gets whatever the identifier points at - preferring playlists, then falling back to individual songs.
 
         If the identifier refers to a song, return a list with just that song. Otherwise, return the full playlist.
         """
-        if name in self.playlists:
-            return [self.get_song(song).uri for song in self.get_playlist(name)]
-        if name not in self.playlists.keys() and name not in self.song_map.keys():
-            raise NotFoundException("Could not find item in playlists: '%s'\nor songs: '%s'" % (
-                                    self.playlists.keys(), self.song_map.keys()))
-
-        return [self.get_song(name).uri]
+        song_map = self.song_map
+        playlist = self.playlists.get(name, None)
+        if playlist is not None:
+            try:
+                return [song_map[song_alias].uri for song_alias in playlist]
+            except KeyError as e:
+                raise NotFoundException("Playlist '%s' refers to song '%s', which isn't in the library",
+                                        name, e.args[0]) from e
+        song = song_map.get(name, None)
+        if song is None:
+            raise NotFoundException("Could not find item in playlists: '%s'\nor songs: '%s'",
+                                    _Preview(self.playlists), _Preview(song_map))
+        return [song.uri]
 
     def create_playlist(self, playlist_name: str, expect_overwrite: bool = False) -> None:
         """Creates a new playlist with the given playlist_name. Can optionally overwrite an existing playlist."""
@@ -213,27 +387,41 @@ class MediaLibrary(object):
             raise IllegalArgument("Expected name for playlist, got \"\"")
         existing_playlist = self.playlists.get(playlist_name, None)
         if existing_playlist is not None and not expect_overwrite:
-            raise AlreadyExistsException(
-                "Playlist '%s' already exists! {%s}" % (playlist_name, existing_playlist))
+            raise AlreadyExistsException("Playlist '%s' already exists! {%s}",
+                                         playlist_name, _Preview(existing_playlist))
+        if existing_playlist:
+            for song_alias in existing_playlist:
+                self._song_playlists[song_alias].pop(playlist_name, None)
         self.playlists[playlist_name] = []
+        self._playlist_cache.pop(playlist_name, None)
+        self._dumps_cache = None
 
     def add_song_to_playlist(self, song_alias: str, playlist_name: str) -> None:
         """Add a song to a playlist based on the input song_alias. The song alias must already exist in the library."""
-        if playlist_name not in self.playlists:
-            raise NotFoundException("Couldn't find playlist '%s' when adding song '%s'" % (playlist_name, song_alias))
-        if not isinstance(song_alias, str):
-            raise IllegalArgument(
-                "Expected object '%s' of type '%s' to be a string song alias" % (
-                    song_alias, type(song_alias).__name__), )
-        if song_alias not in self.song_map.keys():
-            raise NotFoundException("Couldn't find song '%s'" % (song_alias,))
-        self.playlists[playlist_name].append(song_alias)
+        playlist = self.playlists.get(playlist_name, None)
+        if playlist is None:
+            raise NotFoundException("Couldn't find playlist '%s' when adding song '%s'", playlist_name, song_alias)
+        if type(song_alias) is not str:
+            raise IllegalArgument("Expected object '%s' of type '%s' to be a string song alias",
+                                  song_alias, type(song_alias).__name__)
+        if song_alias not in self.song_map:
+            raise NotFoundException("Couldn't find song '%s'", song_alias)
+        song_alias = sys.intern(song_alias)
+        playlist.append(song_alias)
+        self._song_playlists[song_alias][playlist_name] += 1
+        self._playlist_cache.pop(playlist_name, None)
+        self._dumps_cache = None
 
     def remove_from_playlist(self, song_alias: str, playlist_name: str):
-        self.get_playlist(playlist_name).remove(song_alias)
-
-
-# Used to map schema versions to functions that can understand and handle that schema.
-MEDIA_LIBRARY_VERSION_PARSER = {
-    1.0: MediaLibrary.parse_v1
-}
+        """Removes the first occurrence of a song from a playlist."""
+        if playlist_name not in self.playlists:
+            raise NotFoundException("Couldn't find playlist '%s' when removing song '%s'", playlist_name, song_alias)
+        playlist_counts = self._song_playlists.get(song_alias, None)
+        if playlist_counts is None or playlist_name not in playlist_counts:
+            raise NotFoundException("Couldn't find song '%s' in playlist '%s'", song_alias, playlist_name)
+        self.playlists[playlist_name].remove(song_alias)
+        playlist_counts[playlist_name] -= 1
+        if not playlist_counts[playlist_name]:
+            del playlist_counts[playlist_name]
+        self._playlist_cache.pop(playlist_name, None)
+        self._dumps_cache = None
@@ -10,7 +10,7 @@ also come with a slew of edge cases. Be careful when manipulating any code that
 in this file - while the tests cover a lot of the weird edge cases, it's impossible to guarantee they cover
 everything.
 """
-from typing import List, Union, Optional
+from typing import List, Union, Optional, Iterator
 
 
 class Oracle(object):
@@ -25,6 +25,8 @@ class Oracle(object):
     "current_song" will always return the same value after it is called once, until you call "next_song" (on
     properly-implemented clients)
     """
+    # Slotted all the way down - a big chain of playlists is a lot of oracles, and they don't need a __dict__ each.
+    __slots__ = ()
 
     def next_song(self) -> Union[str, None]:
         """
@@ -54,6 +56,10 @@ class Oracle(object):
         pass
 
 
+# Stands in for the memoized current song before there is one - None can't, since None is a valid "song".
+_NOT_MEMOIZED = object()
+
+
 class MemoizingOracle(Oracle):
     """
     An oracle which fulfills the memoizing aspects of the interface as laid out above.
@@ -62,10 +68,10 @@ class MemoizingOracle(Oracle):
     need to do it 15 times. We don't put this logic into the base Oracle class, however, because the PlaylistOracle
     and other simple oracles don't need it.
     """
+    __slots__ = ("memoized_current_song",)
 
     def __init__(self):
-        self.has_memoized_current_song = False
-        self.memoized_current_song = None
+        self.memoized_current_song = _NOT_MEMOIZED
 
     def _inner_next_song(self) -> Union[str, None]:
         raise NotImplementedError("No implementation found for __inner_next_song in '%s'" % (self.__class__,))
@@ -74,17 +80,15 @@ class MemoizingOracle(Oracle):
         raise NotImplementedError("No implementation found for __inner_next_song in '%s'" % (self.__class__,))
 
     def current_song(self):
-        # We make the distinction between "has_memoized_current_song" and "memoized_current_song != None"
-        # because __inner_current_song *might* return None.
-        if not self.has_memoized_current_song:
-            self.memoized_current_song = self._inner_get_first_song()
-            self.has_memoized_current_song = True
-        return self.memoized_current_song
+        # We use a sentinel for "not memoized yet", rather than None, because __inner_current_song *might* return None.
+        song = self.memoized_current_song
+        if song is _NOT_MEMOIZED:
+            song = self.memoized_current_song = self._inner_get_first_song()
+        return song
 
     def next_song(self):
         next_song = self._inner_next_song()
         self.memoized_current_song = next_song
-        self.has_memoized_current_song = True
         return next_song
 
 
@@ -92,24 +96,20 @@ class PlaylistOracle(Oracle):
     """
     A semi-immutable Oracle that iterates through a playlist, then returns None.
     """
+    __slots__ = ("__songs", "__current_song")
 
     def __init__(self, songs: Union[List[str], None]):
-        if songs is None:
-            songs = []
-        self.__playlist = list(songs)
-        self.__pointer = 0
+        # Copied into a tuple so later changes to the caller's list don't leak in. Songs are handed out by stepping an
+        # iterator over it, keeping the current one around - once it runs out, it stays out.
+        self.__songs = iter(tuple(songs) if songs is not None else ())
+        self.__current_song = next(self.__songs, None)
 
     def next_song(self) -> Union[str, None]:
-        self.__pointer += 1
-        if self.__pointer >= len(self.__playlist):
-            return None
-        return_val = self.__playlist[self.__pointer]
-        return return_val
+        self.__current_song = next(self.__songs, None)
+        return self.__current_song
 
     def current_song(self) -> Union[str, None]:
-        if self.__pointer >= len(self.__playlist):
-            return None
-        return self.__playlist[self.__pointer]
+        return self.__current_song
 
 
 class ChainOracle(MemoizingOracle):
@@ -118,6 +118,7 @@ class ChainOracle(MemoizingOracle):
 
     Oracles should be added using the "add" method. This method is append-only, and cannot be undone.
     """
+    __slots__ = ("__oracles", "__pointer", "__has_drawn_from_oracle", "__songs")
 
     def __init__(self):
         super(ChainOracle, self).__init__()
@@ -133,12 +134,23 @@ class ChainOracle(MemoizingOracle):
         # of the "next_song()" because we haven't returned the "current_song()" yet.
         self.__has_drawn_from_oracle = True
 
+        self.__songs = self.__song_generator()
+
     def _inner_next_song(self) -> Union[str, None]:
-        song = None
-        while song is None:
-            current_oracle = self.__get_current_oracle()
-            if current_oracle is None:
-                return None
+        song = next(self.__songs, None)
+        if song is None:
+            # Ran off the end - start a fresh generator, so oracles added from here on still get picked up.
+            self.__songs = self.__song_generator()
+        return song
+
+    def __song_generator(self) -> Iterator[str]:
+        """Yields songs from each oracle in turn, until it runs out of oracles.
+
+        All the state lives on self rather than in the generator, so add(), clear() and reset() take effect straight
+        away, and a fresh generator picks up exactly where the last one stopped.
+        """
+        while self.__pointer < len(self.__oracles):
+            current_oracle = self.__oracles[self.__pointer]
 
             # This covers some nasty edge cases, like "going off the edge in one call
             # to "next_song()" and then adding an oracle and calling "next_song()" again.
@@ -151,19 +163,10 @@ class ChainOracle(MemoizingOracle):
             if song is None:
                 self.__pointer += 1
                 self.__has_drawn_from_oracle = False
+                continue
 
-        self.__has_drawn_from_oracle = True
-        return song
-
-    def __get_current_oracle(self) -> Union[Oracle, None]:
-        """A quick encapsulation of the 'get next' logic to make code function more smoothly
-
-        :return the current oracle, and empty oracle if we haven't called "NextSong" yet, and
-        """
-        if self.__pointer >= len(self.__oracles):
-            return None
-
-        return self.__oracles[self.__pointer]
+            self.__has_drawn_from_oracle = True
+            yield song
 
     def _inner_get_first_song(self) -> Union[str, None]:
         if self.__oracles is None:
@@ -205,6 +208,16 @@ class ChainOracle(MemoizingOracle):
         self.__oracles.clear()
         self.__has_drawn_from_oracle = False
 
+    def reset(self):
+        """Puts this oracle back into the state it was created in, so it can be reused instead of replaced.
+
+        Unlike clear(), this also forgets the memoized current song.
+        """
+        self.__oracles.clear()
+        self.__pointer = 0
+        self.__has_drawn_from_oracle = True
+        self.memoized_current_song = _NOT_MEMOIZED
+
 
 class SwitchOracle(MemoizingOracle):
     """
@@ -213,6 +226,7 @@ class SwitchOracle(MemoizingOracle):
     This oracle has an edge case where, if you call "next_song()" after setting the first oracle but before
     calling literally anything else, it'll return the first song of that oracle.
     """
+    __slots__ = ("__oracle", "__has_gathered_from_oracle", "__ignore_first_song")
 
     def __init__(self):
         super(SwitchOracle, self).__init__()
@@ -276,6 +290,7 @@ class InterruptOracle(MemoizingOracle):
     """
     Allows interrupting an oracle, then going back to whatever was being done before.
     """
+    __slots__ = ("__default_oracle", "_grabbed_first_song", "__interrupt_oracle")
 
     def __init__(self, default_oracle: Optional[Oracle]):
         super(InterruptOracle, self).__init__()
@@ -322,6 +337,7 @@ class RepeatingOracle(Oracle):
     """
     Play a playlist, but forever... or at least the number of "times" passed in initially.
     """
+    __slots__ = ("__playlist", "times", "__pointer")
 
     def __init__(self, playlist: Optional[List[str]], times=None):
         super(RepeatingOracle, self).__init__()
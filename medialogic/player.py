@@ -1,7 +1,7 @@
 """
 This module implements a wrapper around the VLC media player object.
 
-This module is UNTESTED because it's nearly impossible to test a contract with a library like vlc.py *well*.
+This module is mostly UNTESTED because it's nearly impossible to test a contract with a library like vlc.py *well*.
 This *should* be handled by e2e or component tests, but it's unclear how to test media playback. Instead,
 the goal should be to keep this class as small as simple as possible, with an easy interface we can easily
 mock - so that any problems are quickly and immediately apparent with minimal hand-testing, and so that
@@ -10,19 +10,24 @@ when it comes to testing.
 """
 
 import logging
-from time import sleep
+import threading
 
 import vlc  # type: ignore
 
 # noinspection PyUnresolvedReferences
-_VLC_PLAYING_STATES = [
+_VLC_PLAYING_STATES = frozenset([
     vlc.State.Playing,
     vlc.State.Buffering,
     vlc.State.Opening,
-]
+])
+# noinspection PyUnresolvedReferences
+_VLC_PAUSED_STATE = vlc.State.Paused
 
 logger = logging.getLogger("media-player")
 
+# How long to wait for VLC to start playing before setting the output device anyway.
+_PLAYING_TIMEOUT_SECONDS = 2.0
+
 
 class UnspecifiedVLCError(Exception):
     """Reserved for errors with VLC we don't really have control over."""
@@ -36,6 +41,27 @@ def next_song_cb(player):
     return cb
 
 
+def set_event_cb(event: threading.Event):
+    def cb(*_args, **_kwargs):
+        event.set()
+
+    return cb
+
+
+def _set_device_once_playing(player: "Player", mp, events, started_playing: threading.Event, device, song_uri):
+    """Waits for started_playing to be set, then points mp at the given output device.
+
+    If the player has moved on to another song (and so another media player) in the meantime, mp is left alone.
+    """
+    try:
+        if not started_playing.wait(timeout=_PLAYING_TIMEOUT_SECONDS) and player.mp is mp:
+            logger.warning("VLC didn't start playing '%s' in time, setting the audio device anyway", song_uri)
+        if player.mp is mp:
+            mp.audio_output_device_set(None, device)
+    finally:
+        events.event_detach(vlc.EventType.MediaPlayerPlaying)
+
+
 class Player(object):
     """Wraps the VLC object in order to play media."""
 
@@ -76,12 +102,24 @@ class Player(object):
         next_song = self.current_oracle.next_song()
         if next_song is None:
             return
-        self.play_song(next_song)
-        if self.device:
-            # We sleep(1) because otherwise the call won't take if stop() has already been called.
-            # (Don't look at me :shrug:)
-            sleep(1)
-            self.mp.audio_output_device_set(None, self.device)
+        if not self.device:
+            self.play_song(next_song)
+        else:
+            # Setting the device doesn't take until VLC has actually started playing the new media, so wait for it to
+            # say it has. (Don't look at me :shrug:)
+            started_playing = threading.Event()
+            events = self.mp.event_manager()
+            events.event_attach(vlc.EventType.MediaPlayerPlaying, set_event_cb(started_playing))
+            try:
+                self.play_song(next_song)
+            except Exception:
+                events.event_detach(vlc.EventType.MediaPlayerPlaying)
+                raise
+            # This gets called from VLC's own event thread when a song ends, which mustn't be blocked (VLC can't deliver
+            # the event we're waiting for while it is) - so the waiting is handed off to a worker thread.
+            threading.Thread(target=_set_device_once_playing,
+                             args=(self, self.mp, events, started_playing, self.device, next_song),
+                             name="noisebox-set-device", daemon=True).start()
         self.manager.event_attach(vlc.EventType.MediaPlayerEndReached, next_song_cb(self))
 
     def set_pause(self, value: bool):
@@ -94,7 +132,7 @@ class Player(object):
         return not self.playing()
 
     def paused(self):
-        return self.mp.get_state() == vlc.State.Paused
+        return self.mp.get_state() == _VLC_PAUSED_STATE
 
     def playing(self):
         return self.mp.get_state() in _VLC_PLAYING_STATES
@@ -9,16 +9,20 @@ import time
 import traceback
 from concurrent import futures
 from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional
 
 import websockets
-from absl import app
+from absl import app, flags
 
 import common.commands
 from commandserver import v1_server, websocket_muxer
 from commandserver.server_types import v1_command_types as v1_c_types
+from common.command import Command
 from common.exceptions import UserException
 from common.print_controller import print_msg
 from localcli import commands
+from localcli.console import Command as ConsoleCommand
 from localcli.console import Console
 from medialogic.controller import Controller
 from medialogic.media_library import MediaLibrary
@@ -33,77 +37,135 @@ pathlib.Path(LOGS_PATH).parent.absolute().mkdir(exist_ok=True)
 
 logging.basicConfig(level=os.environ.get("LOGLEVEL", "INFO"),filename=LOGS_PATH)
 logger = logging.getLogger("media-player")
-THREAD_POOL = futures.ThreadPoolExecutor(max_workers=10)
+FLAGS = flags.FLAGS
+# Installed as the event loop's default executor, so everything handed to run_in_executor shares this one pool.
+THREAD_POOL = futures.ThreadPoolExecutor(max_workers=int(os.environ.get("THREAD_POOL_SIZE", "10")),
+                                         thread_name_prefix="noisebox")
+
+# Commands available on the local CLI which only need the controller.
+_CONTROLLER_COMMANDS = (
+    commands.ListAudioDevices,
+    commands.GetDevice,
+    commands.SetDevice,
+    commands.AddSong,
+    commands.ListSongs,
+    commands.ListPlaylists,
+    commands.PlaySong,
+    commands.Queue,
+    commands.Play,
+    commands.Pause,
+    commands.Stop,
+    commands.CreatePlaylist,
+    commands.AddSongToPlaylist,
+    commands.SaveLibrary,
+    commands.LoadLibrary,
+    commands.DescribeSong,
+)
+
+# Tracebacks from failed commands are printed at most this often.
+_MIN_TRACEBACK_INTERVAL_SECONDS = .25
+
+# How many console commands can be read ahead of the one being run.
+_COMMAND_QUEUE_SIZE = 64
+
+# Commands that do file IO. They're run with process_async(), which does the IO on the executor so it doesn't hold up
+# the event loop, while the library itself is still only touched from the event loop.
+_BLOCKING_COMMANDS = (
+    commands.SaveLibrary,
+    commands.LoadLibrary,
+)
 
 
 class MediaPlayerMaster(object):
-    # TODO: It'd be nice to make this thing fully-async... as in, including the "CLI" bits.
-
     def __init__(self):
         self.ml = MediaLibrary()
         self.controller = Controller(self.ml)
         self.console = Console()
-        self.console_output = self.console.start()
         self.media_server = v1_server.MediaServer(self.controller, self.ml)
+        self.local_commands = MediaPlayerMaster._build_local_commands(self.controller)
 
-    def start_local_cli(self):
+    @staticmethod
+    def _build_local_commands(controller: Controller) -> Mapping[str, Command]:
+        """Builds the table of commands available on the local CLI, keyed by command name."""
         # "Normal" commands, which only need the controller.
-        commands_dict = {}
-        for class_defn in [
-            commands.ListAudioDevices,
-            commands.GetDevice,
-            commands.SetDevice,
-            commands.AddSong,
-            commands.ListSongs,
-            commands.ListPlaylists,
-            commands.PlaySong,
-            commands.Queue,
-            commands.Play,
-            commands.Pause,
-            commands.Stop,
-            commands.CreatePlaylist,
-            commands.AddSongToPlaylist,
-            commands.SaveLibrary,
-            commands.LoadLibrary,
-            commands.DescribeSong,
-        ]:
-            c = class_defn(self.controller)
-            commands_dict[c.name] = c
+        commands_dict: Dict[str, Command] = {c.name: c for c in (class_defn(controller)
+                                                                 for class_defn in _CONTROLLER_COMMANDS)}
 
         # Special commands.
         commands_dict["help"] = common.commands.Help(commands_dict)
         commands_dict["commands"] = common.commands.ListCommands(commands_dict)
 
-        for console_input in self.console_output.commands():
-            if console_input.command in commands_dict:
+        # The command set is fixed from here on - make sure nothing can change it by accident.
+        return MappingProxyType(commands_dict)
+
+    async def _read_console(self, command_queue: "asyncio.Queue[Optional[ConsoleCommand]]"):
+        """Moves commands from the console onto command_queue, then puts None on it once the console is done."""
+        async for console_input in self.console.async_commands():
+            await command_queue.put(console_input)
+        await command_queue.put(None)
+
+    async def start_local_cli(self):
+        get_command = self.local_commands.get
+        # The next commands are read in while the current one runs. The queue is bounded, so a long script can't
+        # pile up in memory ahead of the commands actually being run.
+        command_queue: "asyncio.Queue[Optional[ConsoleCommand]]" = asyncio.Queue(maxsize=_COMMAND_QUEUE_SIZE)
+        reader = asyncio.create_task(self._read_console(command_queue))
+        last_traceback_time = float("-inf")
+        while True:
+            console_input = await command_queue.get()
+            if console_input is None:
+                break
+            command = get_command(console_input.command)
+            if command is not None:
                 try:
-                    commands_dict[console_input.command].process(console_input.arguments)
+                    if isinstance(command, _BLOCKING_COMMANDS):
+                        await command.process_async(console_input.arguments)
+                    else:
+                        command.process(console_input.arguments)
                 except UserException as e:
-                    print(e.user_error_message)
+                    print(e.get_error_message())
                 except Exception:
-                    traceback.print_exc()
-                    time.sleep(1)
+                    # A burst of bad input shouldn't bury the console in tracebacks - anything not printed still ends
+                    # up in the logs.
+                    now = time.monotonic()
+                    if now - last_traceback_time >= _MIN_TRACEBACK_INTERVAL_SECONDS:
+                        traceback.print_exc()
+                        last_traceback_time = now
+                    else:
+                        logger.exception("Unexpected error running command '%s'", console_input.command)
 
             else:
                 print_msg(
                     "Command not found: '%s' - discarding args '%s'" % (console_input.command, console_input.arguments))
-            if self.console_output.terminate:
-                break
+        reader.cancel()
         self.console.write("Exiting now...")
 
     async def run_server(self):
-        v1 = v1_server.MediaServer(self.controller, self.ml)
         muxer = websocket_muxer.WebsocketMuxer()
-        muxer.register(v1_c_types.SERVING_ADDRESS, v1)
+        muxer.register(v1_c_types.SERVING_ADDRESS, self.media_server)
 
         await websockets.serve(muxer.handle_session, "localhost", v1_c_types.DEFAULT_PORT)
         print_msg("Server running @ ws://localhost:%s..." % v1_c_types.DEFAULT_PORT)
 
 
+def install_uvloop():
+    """Swaps asyncio's default event loop for uvloop's, if it's enabled by flag and installed."""
+    if not FLAGS.use_uvloop:
+        return
+    try:
+        import uvloop  # type: ignore
+    except ImportError:
+        logger.info("uvloop isn't installed - falling back to the default asyncio event loop.")
+        return
+    uvloop.install()
+
+
 def run(*_argv):
+    install_uvloop()
     mps = MediaPlayerMaster()
-    THREAD_POOL.submit(MediaPlayerMaster.start_local_cli, mps)
     event_loop = asyncio.get_event_loop()
+    event_loop.set_default_executor(THREAD_POOL)
+    event_loop.create_task(mps.start_local_cli())
     event_loop.create_task(mps.run_server())
     event_loop.run_forever()
 
@@ -38,10 +38,33 @@ class ParsingTest(unittest.TestCase):
         with self.assertRaises(ValidationError) as e:
             types.Message.parse_raw(json.dumps(message))
 
+    def test_bad_json(self):
+        with self.assertRaises(ValidationError):
+            types.Message.parse_raw('{"command": {"command_name": "TOGGLE_PLAY"')
+
+    def test_parsed_command_name_is_canonical(self):
+        message = types.Message.parse_raw(json.dumps({"command": {"command_name": "TOGGLE_PLAY"}}))
+
+        self.assertIs(message.command.command_name, types.TogglePlayCommand.COMMAND_NAME)
+
+    def test_unknown_command_name(self):
+        message = {
+            "command": {
+                "command_name": "FLORGUS"
+            }
+        }
+
+        with self.assertRaisesRegex(ValidationError, "FLORGUS"):
+            types.Message.parse_raw(json.dumps(message))
+
 
 
 class SanityTest(unittest.TestCase):
 
+    def test_message_names_unique(self):
+        self.assertEqual(len(types.COMMANDS_BY_NAME), len(types.COMMANDS))
+        self.assertEqual(len(types.EVENTS_BY_NAME), len(types.EVENTS))
+
     def test_commands_responses_naming(self):
         bad_commands = []
         for command_t in types.COMMANDS:
@@ -128,6 +151,16 @@ class TypeValidationTest(unittest.TestCase):
             }
         }))
 
+    def test_wrap_unknown_command_raises(self):
+        c = types.Command.construct(command_name="florgus")
+        with self.assertRaises(TypeError):
+            c.wrap()
+
+    def test_wrap_unknown_event_raises(self):
+        e = types.Event.construct(event_name="florgus")
+        with self.assertRaises(TypeError):
+            e.wrap()
+
     def test_wrap_event_with_fields(self):
         """Wrap happens at the Event class level, so we don't need to test individually"""
         e = types.ErrorEvent(
@@ -153,6 +186,20 @@ class TypeValidationTest(unittest.TestCase):
             }
         }))
 
+    def test_json_with_dumps_arguments(self):
+        msg = types.TogglePlayCommand(command_name=types.TogglePlayCommand.COMMAND_NAME, play_state=True).wrap()
+
+        msg_json = msg.json(indent=2, sort_keys=True)
+
+        self.assertEqual(msg_json, json.dumps(json.loads(msg_json), indent=2, sort_keys=True))
+        self.assertEqual(types.Message.parse_raw(msg_json), msg)
+
+    def test_json_with_unsupported_dumps_argument(self):
+        msg = types.NextSongCommand(command_name=types.NextSongCommand.COMMAND_NAME).wrap()
+
+        with self.assertRaisesRegex(TypeError, "ensure_ascii"):
+            msg.json(ensure_ascii=False)
+
     def test_command_unwrap(self):
         c = types.TogglePlayCommand(command_name=types.TogglePlayCommand.COMMAND_NAME, play_state=True)
         msg = c.wrap()
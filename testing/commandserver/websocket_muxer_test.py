@@ -73,9 +73,11 @@ class ResponseCollector:
 
     def __init__(self):
         self.responses: List[c_types.Message] = []
+        self.frame_types: List[type] = []
 
     async def route_responses(self, ws: websockets.WebSocketClientProtocol):
         async for message in ws:
+            self.frame_types.append(type(message))
             self.responses.append(c_types.Message.parse_raw(message).event)
 
 
@@ -153,6 +155,8 @@ class WebsocketMuxerTest(FlagsTest, unittest.IsolatedAsyncioTestCase):
 
         self.assertConnectionClosedSuccessfully(client)
         self.assertListEqual(rc.responses, server_responses)
+        # Responses must arrive as text frames, not binary ones.
+        self.assertListEqual(rc.frame_types, [str, str, str])
 
     async def test_multiple_paths(self):
         muxer = websocket_muxer.WebsocketMuxer()
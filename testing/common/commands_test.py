@@ -0,0 +1,39 @@
+"""Tests for common/commands.py"""
+import unittest
+from unittest import mock
+
+from absl.testing import absltest
+
+from common import commands
+
+
+class HelpTest(unittest.TestCase):
+
+    def test_missing_command_lists_available_commands(self):
+        command_dict = {}
+        help_command = commands.Help(command_dict)
+        command_dict["help"] = help_command
+        command_dict["commands"] = commands.ListCommands(command_dict)
+
+        with mock.patch("common.commands.print_msg") as print_msg:
+            help_command.do_function("florgus")
+
+        print_msg.assert_called_once_with(
+            "Cannot find command 'florgus'.\n\nAvailable commands: 'commands, help'")
+
+    def test_available_commands_updated_after_adding_commands(self):
+        command_dict = {}
+        help_command = commands.Help(command_dict)
+        command_dict["help"] = help_command
+
+        with mock.patch("common.commands.print_msg") as print_msg:
+            help_command.do_function("florgus")
+            command_dict["commands"] = commands.ListCommands(command_dict)
+            help_command.do_function("florgus")
+
+        print_msg.assert_called_with(
+            "Cannot find command 'florgus'.\n\nAvailable commands: 'commands, help'")
+
+
+if __name__ == '__main__':
+    absltest.main()
@@ -1,14 +1,22 @@
 """Tests for console.py"""
+import io
 import logging
+import os
+import queue
+import shlex
+import threading
 import unittest
 from typing import List
 from unittest import mock
 
 from absl.testing import absltest
+from parameterized import parameterized
 
 from common import print_controller
 from localcli.console import Command
 from localcli.console import Console
+from localcli.console import ConsoleOutput
+from localcli.console import split_input
 
 
 class ConsoleTest(unittest.TestCase):
@@ -50,6 +58,124 @@ class ConsoleTest(unittest.TestCase):
 
         self.assertListEqual(commands, [])
 
+    def test_commands_times_out(self):
+        console = Console()
+
+        self.assertRaises(queue.Empty, lambda: list(console.console_output.commands(timeout=.01)))
+
+    def test_add_command_blocks_while_full(self):
+        console_output = ConsoleOutput(maxsize=1)
+        console_output.add_command(Command("test1"))
+        adder = threading.Thread(target=console_output.add_command, args=(Command("test2"),))
+        adder.start()
+        adder.join(timeout=.05)
+        blocked_while_full = adder.is_alive()
+
+        commands = console_output.commands(timeout=1.5)
+        first_command = next(commands)
+        adder.join(timeout=1.5)
+        second_command = next(commands)
+
+        self.assertTrue(blocked_while_full)
+        self.assertEqual(first_command, Command("test1"))
+        self.assertEqual(second_command, Command("test2"))
+
+    def test_start_reads_lines_from_pipe(self):
+        read_fd, write_fd = os.pipe()
+        with os.fdopen(read_fd, "r") as console_input:
+            console = Console(console_input=console_input, output=io.StringIO())
+            c_out = console.start()
+            os.write(write_fd, b"test1 'something'\ntest2 'something else'\n")
+            os.write(write_fd, b"test3")
+            os.close(write_fd)
+
+            commands = list(c_out.commands(timeout=1.5))
+
+        self.assertListEqual(commands, [
+            Command("test1", ["something"]),
+            Command("test2", ["something else"]),
+            Command("test3", []),
+        ])
+
+    def test_start_reads_lines_from_unselectable_input(self):
+        console = Console(console_input=io.StringIO("test1 'something'\ntest2\n"), output=io.StringIO())
+        c_out = console.start()
+
+        commands = list(c_out.commands(timeout=1.5))
+
+        self.assertListEqual(commands, [Command("test1", ["something"]), Command("test2", [])])
+
+
+class SplitInputTest(unittest.TestCase):
+
+    @parameterized.expand([
+        ("play florgus",),
+        ("  play   'florgus beats'  \n",),
+        ("queue \"florgus beats\" 'blorgus beats'",),
+        ("play ''",),
+        ("play 'it''s'",),
+        ("play flor'gus beats'",),
+        ("play florgus\\ beats",),
+        ("play \"florgus \\\"beats\\\"\"",),
+        ("play #florgus",),
+        ("play florgus\xa0beats",),
+        ("\"a\\\\\" b",),
+        ("'a\\' b",),
+    ])
+    def test_matches_shlex(self, console_input):
+        self.assertListEqual(split_input(console_input), shlex.split(console_input, comments=False, posix=True))
+
+    def test_unbalanced_quotes_raise(self):
+        self.assertRaises(ValueError, lambda: split_input("play 'florgus"))
+        self.assertRaises(ValueError, lambda: split_input("\"b\\\""))
+
+
+class AsyncConsoleTest(unittest.IsolatedAsyncioTestCase):
+    async def test_async_commands_read_from_pipe(self):
+        read_fd, write_fd = os.pipe()
+        with os.fdopen(write_fd, "w") as pipe_in:
+            pipe_in.write("test1 'something'\n\ntest2 'something else'\n")
+        with os.fdopen(read_fd) as console_input:
+            console = Console(console_input=console_input, output=io.StringIO())
+
+            commands = [command async for command in console.async_commands()]
+
+        self.assertListEqual(commands, [
+            Command("test1", ["something"]),
+            Command("test2", ["something else"]),
+        ])
+
+    async def test_async_commands_stop_at_exit(self):
+        read_fd, write_fd = os.pipe()
+        with os.fdopen(write_fd, "w") as pipe_in:
+            pipe_in.write("test1\nexit\ntest2\n")
+        with os.fdopen(read_fd) as console_input:
+            console = Console(console_input=console_input, output=io.StringIO())
+
+            commands = [command async for command in console.async_commands()]
+
+        self.assertListEqual(commands, [Command("test1", [])])
+
+    async def test_async_commands_skip_unparseable_lines(self):
+        read_fd, write_fd = os.pipe()
+        with os.fdopen(write_fd, "w") as pipe_in:
+            pipe_in.write("test1 'something\ntest2\n")
+        with os.fdopen(read_fd) as console_input:
+            output = io.StringIO()
+            console = Console(console_input=console_input, output=output)
+
+            commands = [command async for command in console.async_commands()]
+
+        self.assertListEqual(commands, [Command("test2", [])])
+        self.assertIn("Couldn't parse 'test1 'something'", output.getvalue())
+
+    async def test_async_commands_fall_back_for_unwatchable_input(self):
+        console = Console(console_input=io.StringIO("test1 'something'\ntest2\n"), output=io.StringIO())
+
+        commands = [command async for command in console.async_commands()]
+
+        self.assertListEqual(commands, [Command("test1", ["something"]), Command("test2", [])])
+
 
 class PrinterTest(unittest.TestCase):
 
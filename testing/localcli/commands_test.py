@@ -1,6 +1,8 @@
 """
 Unittests for commands.py.
 """
+import os
+import tempfile
 import unittest
 from typing import List
 from unittest import mock
@@ -74,5 +76,44 @@ class ListSongsTest(unittest.TestCase):
         self.assertListEqual(mock_printer.get_printed(), [])
 
 
+class SaveLoadLibraryTest(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        # Libraries are saved relative to the working directory.
+        self.old_cwd = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.temp_dir.cleanup()
+
+    async def testSaveThenLoad(self):
+        # Only the library is used by these commands, so there's no need for a real (VLC backed) controller.
+        saved = mock.MagicMock(media_library=MediaLibrary())
+        loaded = mock.MagicMock(media_library=MediaLibrary())
+        with mock.patch("medialogic.media_library.os.path.isfile", lambda _: True):
+            saved.media_library.add_song(Song("TEST", "c:\\save_load.mp3"))
+            saved.media_library.create_playlist("playlist")
+            saved.media_library.add_song_to_playlist("TEST", "playlist")
+
+            with self.assertLogs("media-player", level="INFO") as logs:
+                await commands.SaveLibrary(saved).process_async(["test_library"])
+                await commands.LoadLibrary(loaded).process_async(["test_library"])
+
+        self.assertEqual(loaded.media_library, saved.media_library)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn("save", logs.records[0].getMessage())
+        self.assertIn("load", logs.records[1].getMessage())
+
+    async def testNoName(self):
+        c = mock.MagicMock(media_library=MediaLibrary())
+
+        with self.assertRaises(IllegalArgument):
+            await commands.SaveLibrary(c).process_async([""])
+        with self.assertRaises(IllegalArgument):
+            await commands.LoadLibrary(c).process_async([""])
+
+
 if __name__ == '__main__':
     absltest.main()
@@ -1,6 +1,10 @@
 """
 Tests for media_library.py.
 """
+import atexit
+import json
+import os
+import shutil
 import tempfile
 import unittest
 from collections import defaultdict
@@ -12,7 +16,9 @@ from medialogic.media_library import MediaLibrary, Song
 
 COUNTER_DICT = defaultdict(lambda: 0)
 
-FILE = []
+# Song files are created as empty files in a single temp directory, cleaned up once the tests finish.
+SONG_DIR = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, SONG_DIR, ignore_errors=True)
 
 
 def song(name: str = "", uri: str = "", description="test_description"):
@@ -22,15 +28,17 @@ def song(name: str = "", uri: str = "", description="test_description"):
         COUNTER_DICT["song_name"] += 1
     if uri == "":
         test_c = COUNTER_DICT["song_uri"]
-        f = tempfile.TemporaryFile(suffix="_%04d.mp3" % (test_c,))
+        uri = os.path.join(SONG_DIR, "test_%04d.mp3" % (test_c,))
         COUNTER_DICT["song_uri"] += 1
-        FILE.append(f)
-        uri = f.name
+        open(uri, "wb").close()
 
     return Song(name, uri, description)
 
 
 class SongTests(unittest.TestCase):
+    def setUp(self):
+        media_library._isfile_cached.cache_clear()
+
     def test_add_song(self):
         ml = MediaLibrary()
         s = song()
@@ -51,6 +59,14 @@ class SongTests(unittest.TestCase):
         self.assertRaises(media_library.NotFoundException,
                           lambda: ml.add_song(song(uri="C:\\something\\ invalid.mp3")))
 
+    def test_finds_file_created_after_failed_check(self):
+        uri = os.path.join(SONG_DIR, "created_later.mp3")
+        self.assertRaises(media_library.NotFoundException, lambda: Song("created_later", uri))
+
+        open(uri, "wb").close()
+
+        self.assertEqual(Song("created_later", uri).uri, uri)
+
     def test_overwrite_works_when_expected(self):
         ml = MediaLibrary()
         s1 = song(name="test")
@@ -96,7 +112,7 @@ class PlaylistTests(unittest.TestCase):
         ml = MediaLibrary()
         ml.create_playlist("something")
 
-        self.assertDictEqual(ml.playlists, {"something": []})
+        self.assertDictEqual(dict(ml.list_playlists()), {"something": []})
 
     def test_add_song(self):
         ml = MediaLibrary()
@@ -106,7 +122,7 @@ class PlaylistTests(unittest.TestCase):
         ml.add_song(s)
         ml.add_song_to_playlist(song_alias=s.alias, playlist_name="something")
 
-        self.assertDictEqual(ml.playlists, {"something": [s.alias]})
+        self.assertDictEqual(dict(ml.list_playlists()), {"something": [s.alias]})
 
     def test_song_missing(self):
         ml = MediaLibrary()
@@ -126,7 +142,101 @@ class PlaylistTests(unittest.TestCase):
         ml.add_song_to_playlist(song_alias=s1.alias, playlist_name="test")
         ml.add_song_to_playlist(song_alias=s2.alias, playlist_name="test")
 
-        self.assertDictEqual(ml.playlists, {"test": [s1.alias, s2.alias]})
+        self.assertDictEqual(dict(ml.list_playlists()), {"test": [s1.alias, s2.alias]})
+
+    def test_add_song_twice_keeps_both_entries(self):
+        ml = MediaLibrary()
+        s1 = song()
+        s2 = song()
+        ml.create_playlist("test")
+        ml.add_song(s1)
+        ml.add_song(s2)
+
+        ml.add_song_to_playlist(s1.alias, "test")
+        ml.add_song_to_playlist(s2.alias, "test")
+        ml.add_song_to_playlist(s1.alias, "test")
+
+        self.assertTupleEqual(ml.get_playlist("test"), (s1.alias, s2.alias, s1.alias))
+
+    def test_remove_from_playlist_removes_first_entry(self):
+        ml = MediaLibrary()
+        s1 = song()
+        s2 = song()
+        ml.create_playlist("test")
+        ml.add_song(s1)
+        ml.add_song(s2)
+        ml.add_song_to_playlist(s1.alias, "test")
+        ml.add_song_to_playlist(s2.alias, "test")
+        ml.add_song_to_playlist(s1.alias, "test")
+
+        ml.remove_from_playlist(s1.alias, "test")
+
+        self.assertTupleEqual(ml.get_playlist("test"), (s2.alias, s1.alias))
+        ml.remove_from_playlist(s1.alias, "test")
+        self.assertTupleEqual(ml.get_playlist("test"), (s2.alias,))
+        self.assertRaises(media_library.NotFoundException, lambda: ml.remove_from_playlist(s1.alias, "test"))
+
+    def test_remove_missing_song_throws(self):
+        ml = MediaLibrary()
+        s1 = song()
+        ml.create_playlist("test")
+        ml.add_song(s1)
+
+        self.assertRaises(media_library.NotFoundException, lambda: ml.remove_from_playlist(s1.alias, "test"))
+
+    def test_not_found_message_previews_library(self):
+        ml = MediaLibrary()
+        for i in range(30):
+            ml.create_playlist("playlist-%02d" % (i,))
+
+        with self.assertRaises(media_library.NotFoundException) as e:
+            ml.get_playlist("florgus")
+
+        self.assertIn("Playlist 'florgus' not found", e.exception.get_error_message())
+        self.assertIn("'playlist-19', ...]", e.exception.get_error_message())
+        self.assertNotIn("playlist-20", e.exception.get_error_message())
+
+    def test_not_found_message_shows_library_when_raised(self):
+        ml = MediaLibrary()
+        ml.create_playlist("playlist-00")
+
+        with self.assertRaises(media_library.NotFoundException) as e:
+            ml.get_playlist("florgus")
+        ml.create_playlist("playlist-01")
+
+        self.assertIn("playlist-00", e.exception.get_error_message())
+        self.assertNotIn("playlist-01", e.exception.get_error_message())
+
+    def test_remove_song_removes_from_playlists(self):
+        ml = MediaLibrary()
+        s1 = song()
+        s2 = song()
+        ml.add_song(s1)
+        ml.add_song(s2)
+        ml.create_playlist("test-1")
+        ml.create_playlist("test-2")
+        ml.add_song_to_playlist(s1.alias, "test-1")
+        ml.add_song_to_playlist(s2.alias, "test-1")
+        ml.add_song_to_playlist(s1.alias, "test-2")
+        ml.add_song_to_playlist(s1.alias, "test-1")
+
+        ml.remove_song(s1.alias)
+
+        self.assertDictEqual(ml.song_map, {s2.alias: s2})
+        self.assertDictEqual(dict(ml.list_playlists()), {"test-1": [s2.alias], "test-2": []})
+
+    def test_remove_song_after_playlist_overwritten(self):
+        ml = MediaLibrary()
+        s1 = song()
+        ml.add_song(s1)
+        ml.create_playlist("test")
+        ml.add_song_to_playlist(s1.alias, "test")
+        ml.create_playlist("test", expect_overwrite=True)
+
+        ml.remove_song(s1.alias)
+
+        self.assertDictEqual(ml.song_map, {})
+        self.assertDictEqual(dict(ml.list_playlists()), {"test": []})
 
     def test_multiple_playlists(self):
         ml = MediaLibrary()
@@ -141,7 +251,7 @@ class PlaylistTests(unittest.TestCase):
         ml.add_song_to_playlist(s1.alias, "test-1")
         ml.add_song_to_playlist(s2.alias, "test-2")
 
-        self.assertDictEqual(ml.playlists, {"test-1": [s1.alias], "test-2": [s2.alias]})
+        self.assertDictEqual(dict(ml.list_playlists()), {"test-1": [s1.alias], "test-2": [s2.alias]})
 
     def test_get_playlist(self):
         ml = MediaLibrary()
@@ -149,7 +259,7 @@ class PlaylistTests(unittest.TestCase):
         ml.create_playlist("test")
         ml.add_song(s)
         ml.add_song_to_playlist(s.alias, "test")
-        self.assertListEqual(ml.get_playlist("test"), [s.alias])
+        self.assertTupleEqual(ml.get_playlist("test"), (s.alias,))
 
     def test_get_playlist_write_protected(self):
         """Make sure users can't change playlists by getting them."""
@@ -161,9 +271,42 @@ class PlaylistTests(unittest.TestCase):
         ml.add_song(s2)
 
         ml.add_song_to_playlist(s1.alias, "test")
-        ml.get_playlist("test").append(s2.alias)
 
-        self.assertListEqual(ml.get_playlist("test"), [s1.alias])
+        self.assertRaises(AttributeError, lambda: ml.get_playlist("test").append(s2.alias))
+        self.assertTupleEqual(ml.get_playlist("test"), (s1.alias,))
+
+    def test_get_playlist_reflects_changes(self):
+        ml = MediaLibrary()
+        s1 = song()
+        s2 = song()
+        ml.create_playlist("test")
+        ml.add_song(s1)
+        ml.add_song(s2)
+        ml.add_song_to_playlist(s1.alias, "test")
+        before_add = ml.get_playlist("test")
+
+        ml.add_song_to_playlist(s2.alias, "test")
+        after_add = ml.get_playlist("test")
+        ml.remove_from_playlist(s1.alias, "test")
+        after_remove = ml.get_playlist("test")
+
+        self.assertTupleEqual(before_add, (s1.alias,))
+        self.assertTupleEqual(after_add, (s1.alias, s2.alias))
+        self.assertTupleEqual(after_remove, (s2.alias,))
+
+    def test_get_playlist_or_song(self):
+        ml = MediaLibrary()
+        s1 = song()
+        s2 = song()
+        ml.add_song(s1)
+        ml.add_song(s2)
+        ml.create_playlist("test")
+        ml.add_song_to_playlist(s2.alias, "test")
+        ml.add_song_to_playlist(s1.alias, "test")
+
+        self.assertListEqual(ml.get("test"), [s2.uri, s1.uri])
+        self.assertListEqual(ml.get(s1.alias), [s1.uri])
+        self.assertRaises(media_library.NotFoundException, lambda: ml.get("florgus"))
 
     # noinspection PyTypeChecker
     def test_cant_add_song_directly(self):
@@ -184,10 +327,13 @@ class PlaylistTests(unittest.TestCase):
         ml.add_song_to_playlist(s.alias, "test")
         ml.create_playlist("test", expect_overwrite=True)
 
-        self.assertListEqual(ml.get_playlist("test"), [])
+        self.assertTupleEqual(ml.get_playlist("test"), ())
 
 
 class SongTest(unittest.TestCase):
+    def setUp(self):
+        media_library._isfile_cached.cache_clear()
+
     def test_to_primitive(self):
         s = song()
         self.assertDictEqual(
@@ -199,6 +345,15 @@ class SongTest(unittest.TestCase):
                 "description": s.description,
             })
 
+    def test_songs_are_immutable(self):
+        s = song(description="old description")
+
+        def set_description():
+            s.description = "new description"
+
+        self.assertRaises(AttributeError, set_description)
+        self.assertEqual(s.to_primitive()[Song.DESCRIPTION_FIELD], "old description")
+
     def test_to_from(self):
         s = song()
         output = Song.from_primitive(s.to_primitive())
@@ -254,6 +409,52 @@ class MediaLibrarySerializationTest(unittest.TestCase):
         ml.add_song_to_playlist(s1.alias, "test")
         self.assertEqual(MediaLibrary.from_primitive(ml.to_primitive()), ml)
 
+    def test_dumps_loads(self):
+        ml = MediaLibrary()
+        s1 = song()
+        s2 = song()
+        ml.add_song(s1)
+        ml.add_song(s2)
+        ml.create_playlist("test")
+        ml.add_song_to_playlist(s2.alias, "test")
+        ml.add_song_to_playlist(s1.alias, "test")
+
+        loaded = MediaLibrary.loads(ml.dumps())
+
+        self.assertEqual(loaded, ml)
+        self.assertEqual(json.loads(ml.dumps()), ml.to_primitive())
+
+    def test_dumps_loads_keeps_repeated_playlist_entries(self):
+        ml = MediaLibrary()
+        s1 = song()
+        s2 = song()
+        ml.add_song(s1)
+        ml.add_song(s2)
+        ml.create_playlist("test")
+        ml.add_song_to_playlist(s1.alias, "test")
+        ml.add_song_to_playlist(s2.alias, "test")
+        ml.add_song_to_playlist(s1.alias, "test")
+
+        loaded = MediaLibrary.loads(ml.dumps())
+
+        self.assertEqual(loaded, ml)
+        self.assertTupleEqual(loaded.get_playlist("test"), (s1.alias, s2.alias, s1.alias))
+
+    def test_dumps_reflects_changes(self):
+        ml = MediaLibrary()
+        s1 = song()
+        ml.add_song(s1)
+        ml.create_playlist("test")
+        first_dump = ml.dumps()
+        unchanged_dump = ml.dumps()
+
+        ml.add_song_to_playlist(s1.alias, "test")
+        changed_dump = ml.dumps()
+
+        self.assertIs(unchanged_dump, first_dump)
+        self.assertEqual(json.loads(changed_dump)[MediaLibrary.PLAYLIST_FIELD], {"test": [s1.alias]})
+        self.assertIs(ml.dumps(), changed_dump)
+
     def test_v1_parse(self):
         ml = MediaLibrary()
         s1 = song()
@@ -266,6 +467,29 @@ class MediaLibrarySerializationTest(unittest.TestCase):
             MediaLibrary.PLAYLIST_FIELD: {"test": [s1.alias]},
         }), ml)
 
+    def test_v1_parse_checks_uris(self):
+        missing_song_primitive = {
+            media_library.VERSION_FIELD: 1.0,
+            Song.ALIAS_FIELD: "missing",
+            Song.URI_FIELD: "C:\\something\\ invalid.mp3",
+        }
+
+        self.assertRaises(media_library.NotFoundException, lambda: MediaLibrary.parse_v1({
+            media_library.VERSION_FIELD: 1.0,
+            MediaLibrary.SONGS_FIELD: [missing_song_primitive],
+            MediaLibrary.PLAYLIST_FIELD: {},
+        }))
+
+    def test_int_version_accepted(self):
+        self.assertEqual(MediaLibrary.from_primitive({media_library.VERSION_FIELD: 1}), MediaLibrary())
+
+    def test_bad_versions_rejected(self):
+        for version in (True, "1.0", 2.0):
+            self.assertRaises(media_library.BadFormatException,
+                              lambda: MediaLibrary.from_primitive({media_library.VERSION_FIELD: version}))
+            self.assertRaises(media_library.BadFormatException,
+                              lambda: Song.from_primitive({media_library.VERSION_FIELD: version}))
+
 
 if __name__ == '__main__':
     absltest.main()
@@ -166,6 +166,26 @@ class ChainTest(unittest.TestCase):
 
         self.assertListEqual(collected, ["1", "2", "4", "5", None])
 
+    def test_reset_acts_like_new_oracle(self):
+        songs1 = ["1", "2", "3"]
+        p1 = oracles.PlaylistOracle(songs1)
+        songs2 = ["4", "5", "6"]
+        p2 = oracles.PlaylistOracle(songs2)
+        p3 = oracles.PlaylistOracle(songs2)
+        o = oracles.ChainOracle()
+        o.add(oracles.PlaylistOracle(["0"]))
+        o.add(p1)
+        collect(o)
+
+        o.reset()
+        o.add(p2)
+        collected = collect(o)
+        fresh = oracles.ChainOracle()
+        fresh.add(p3)
+
+        self.assertListEqual(collected, collect(fresh))
+        self.assertListEqual(collected, songs2)
+
     def test_none_returning_current_song_sticks(self):
         songs = ["1", "2", "3"]
         p = oracles.PlaylistOracle(songs)
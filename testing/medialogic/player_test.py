@@ -0,0 +1,115 @@
+"""Tests player.py.
+
+VLC itself isn't exercised here - its media players are mocked out, so these only cover how Player drives them.
+"""
+import threading
+import unittest
+from unittest import mock
+
+import vlc  # type: ignore
+from absl.testing import absltest
+
+from medialogic import player
+
+
+class ListOracle(object):
+    """Hands out the given songs in order, then nothing."""
+
+    def __init__(self, *song_uris):
+        self.songs = list(reversed(song_uris))
+
+    def next_song(self):
+        return self.songs.pop() if self.songs else None
+
+
+def attached_callback(media_player, event_type):
+    """Returns the last callback attached to the mocked media_player's event manager for event_type."""
+    for call in reversed(media_player.event_manager().event_attach.call_args_list):
+        if call.args[0] == event_type:
+            return call.args[1]
+    raise AssertionError("Nothing attached for %s" % (event_type,))
+
+
+class PlayerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.media_players = []
+
+        def new_media_player():
+            media_player = mock.MagicMock()
+            media_player.play.return_value = 0
+            # Set once the output device is set, which happens on another thread.
+            media_player.device_set = threading.Event()
+            media_player.audio_output_device_set.side_effect = lambda *_args: media_player.device_set.set()
+            # Set once the worker setting the device is done with this media player.
+            media_player.detached = threading.Event()
+            media_player.event_manager().event_detach.side_effect = lambda *_args: media_player.detached.set()
+            self.media_players.append(media_player)
+            return media_player
+
+        patchers = [
+            mock.patch("medialogic.player.vlc.MediaPlayer", side_effect=new_media_player),
+            mock.patch("medialogic.player.vlc.Media"),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_next_song_without_device(self):
+        p = player.Player()
+
+        p.play_oracle(ListOracle("song.mp3"))
+
+        media_player = self.media_players[-1]
+        media_player.play.assert_called_once()
+        media_player.audio_output_device_set.assert_not_called()
+
+    def test_next_song_sets_device_once_playing(self):
+        p = player.Player()
+        p.set_device("device")
+
+        p.play_oracle(ListOracle("song.mp3"))
+        media_player = self.media_players[-1]
+
+        # next_song has already returned, without waiting for VLC to start playing.
+        media_player.play.assert_called_once()
+        self.assertFalse(media_player.device_set.wait(timeout=.05))
+
+        attached_callback(media_player, vlc.EventType.MediaPlayerPlaying)()
+
+        self.assertTrue(media_player.detached.wait(timeout=1.5))
+        media_player.audio_output_device_set.assert_called_once_with(None, "device")
+        media_player.event_manager().event_detach.assert_called_once_with(vlc.EventType.MediaPlayerPlaying)
+
+    def test_next_song_sets_device_after_timeout(self):
+        p = player.Player()
+        p.set_device("device")
+
+        with mock.patch("medialogic.player._PLAYING_TIMEOUT_SECONDS", .01):
+            p.play_oracle(ListOracle("song.mp3"))
+            media_player = self.media_players[-1]
+
+            self.assertTrue(media_player.detached.wait(timeout=1.5))
+
+        media_player.audio_output_device_set.assert_called_once_with(None, "device")
+        media_player.event_manager().event_detach.assert_called_once_with(vlc.EventType.MediaPlayerPlaying)
+
+    def test_skipped_song_leaves_device_alone(self):
+        p = player.Player()
+        p.set_device("device")
+
+        p.play_oracle(ListOracle("song1.mp3", "song2.mp3"))
+        skipped_player = self.media_players[-1]
+        p.next_song()
+        media_player = self.media_players[-1]
+        attached_callback(skipped_player, vlc.EventType.MediaPlayerPlaying)()
+        attached_callback(media_player, vlc.EventType.MediaPlayerPlaying)()
+
+        self.assertTrue(skipped_player.detached.wait(timeout=1.5))
+        self.assertTrue(media_player.detached.wait(timeout=1.5))
+        skipped_player.audio_output_device_set.assert_not_called()
+        media_player.audio_output_device_set.assert_called_once_with(None, "device")
+
+
+if __name__ == '__main__':
+    absltest.main()